@@ -0,0 +1,137 @@
+"""
+Buffered per-session usage tracking (last_used, send_count)
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    """Coalesce session usage in memory and write it in batches
+
+    record() only updates a dict entry, so it is safe to call on hot paths;
+    repeated use of one session between flushes becomes a single row.
+    writer(batch_id, entries) receives up to batch_size (session_id,
+    last_used, sends) tuples, last_used being epoch seconds, and returns
+    truthy on success. It must apply a batch_id at most once.
+
+    A failed batch is kept unchanged and sent again with the same batch_id
+    on the next flush, before newer usage; a write that failed after the
+    database applied it is then skipped rather than counted twice. At most
+    max_retained failed batches are kept; older ones are dropped.
+    """
+
+    def __init__(self, writer, interval=30.0, max_pending=500, batch_size=500, max_retained=100):
+        self.writer = writer
+        self.interval = interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.max_retained = max_retained
+        self._pending = {}
+        self._retry = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = None
+        self._loop = None
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def record(self, session_id, sends=0):
+        """Note that a session was used (and how many messages it sent)"""
+        now = time.time()
+        with self._lock:
+            entry = self._pending.get(session_id)
+            if entry is None:
+                self._pending[session_id] = [now, sends]
+                full = len(self._pending) >= self.max_pending
+            else:
+                entry[0] = now
+                entry[1] += sends
+                full = False
+            self.recorded += 1
+        if full:
+            self.notify()
+
+    def flush(self):
+        """Write failed batches again, then everything pending; returns how many sessions were written"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            entries = [(session_id, last_used, sends) for session_id, (last_used, sends) in pending.items()]
+            batches = list(self._retry)
+            self._retry.clear()
+            for start in range(0, len(entries), self.batch_size):
+                batches.append((uuid.uuid4().hex, entries[start:start + self.batch_size]))
+            if not batches:
+                return 0
+
+            written = 0
+            for index, (batch_id, batch) in enumerate(batches):
+                try:
+                    ok = self.writer(batch_id, batch)
+                except Exception as e:
+                    logger.error(f"Activity flush error: {e}")
+                    ok = False
+                if ok:
+                    written += len(batch)
+                    continue
+                # The store is failing; keep this batch and the rest for the next flush
+                self.failures += 1
+                self._retry.extend(batches[index:])
+                break
+
+            while len(self._retry) > self.max_retained:
+                batch_id, batch = self._retry.popleft()
+                self.dropped += len(batch)
+                logger.error(f"Dropping activity batch {batch_id} ({len(batch)} sessions) after repeated failures")
+            self.flushes += 1
+            self.written += written
+            return written
+
+    def notify(self):
+        """Wake the flush loop early (safe from any thread)"""
+        if self._wakeup is None or self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass
+
+    async def run(self):
+        """Flush every interval seconds, or sooner once max_pending sessions are waiting"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # The writer blocks on the network; keep it off the event loop
+            await asyncio.to_thread(self.flush)
+
+    def __len__(self):
+        retained = sum(len(batch) for _, batch in list(self._retry))
+        with self._lock:
+            return len(self._pending) + retained
+
+    def stats(self):
+        return {
+            'pending': len(self),
+            'recorded': self.recorded,
+            'written': self.written,
+            'flushes': self.flushes,
+            'failures': self.failures,
+            'retained_batches': len(self._retry),
+            'dropped': self.dropped,
+            'interval': self.interval
+        }
@@ -0,0 +1,188 @@
+"""
+ASGI entry point: serves the webhook on an event loop
+
+Run with:  uvicorn asgi:application --host 0.0.0.0 --port $PORT
+
+Handlers written as ``async def handle(...)`` are awaited directly (on the
+background Telegram loop); plain ``def handle(...)`` handlers run in a
+thread pool, so both styles work unchanged.
+"""
+import asyncio
+import json
+import logging
+import os
+from urllib.parse import parse_qs
+
+from app import (
+    background_loop,
+    WEBHOOK_MODE,
+    clear_pending_updates,
+    enqueue_update,
+    handler_executor,
+    health_payload,
+    METRICS_CONTENT_TYPE,
+    process_update_once_async,
+    readiness,
+    registry,
+    shutdown,
+    status_payload,
+    TRACE_PROFILE_HEADER,
+    tracer,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def read_body(receive):
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_text(send, text, content_type, status=200):
+    body = text.encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode()),
+            (b'content-length', str(len(body)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def header(scope, name):
+    name = name.lower().encode()
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def send_empty(send, status=200):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-length', b'0')],
+    })
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            background_loop.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def handle_update(scope, receive, send, token):
+    if not token:
+        await send_json(send, {
+            'error': 'Token required',
+            'solution': 'Add ?token=YOUR_BOT_TOKEN to URL or set BOT_TOKEN environment variable'
+        }, 400)
+        return
+
+    try:
+        update = json.loads(await read_body(receive) or b'null')
+    except ValueError:
+        update = None
+
+    if not update:
+        await send_json(send, {'error': 'Invalid JSON data'}, 400)
+        return
+
+    if WEBHOOK_MODE == 'queue':
+        body, status = enqueue_update(token, update)
+        await send_json(send, body, status)
+        return
+
+    try:
+        profile = tracer.profile_requested(header(scope, TRACE_PROFILE_HEADER))
+        await send_json(send, await process_update_once_async(update, token, profile))
+    except Exception as e:
+        logger.error(f'❌ Error: {e}')
+        await send_json(send, {'error': 'Processing failed'}, 500)
+
+
+async def application(scope, receive, send):
+    """ASGI application serving /, /webhook, /health, /ready, /metrics and /clear_pending"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path'].rstrip('/') or '/'
+    method = scope['method']
+    query = parse_qs(scope.get('query_string', b'').decode())
+    token = (query.get('token') or [None])[0] or os.environ.get('BOT_TOKEN')
+
+    if path == '/':
+        if method == 'HEAD':
+            await send_empty(send)
+        elif method == 'GET':
+            if not token:
+                await send_json(send, {
+                    'error': 'Token required',
+                    'solution': 'Add ?token=YOUR_BOT_TOKEN to URL or set BOT_TOKEN environment variable'
+                }, 400)
+            else:
+                await send_json(send, status_payload())
+        elif method == 'POST':
+            await handle_update(scope, receive, send, token)
+        else:
+            await send_empty(send, 405)
+
+    elif path == '/webhook':
+        if method == 'POST':
+            await handle_update(scope, receive, send, token)
+        else:
+            await send_empty(send, 405)
+
+    elif path == '/health':
+        await send_json(send, health_payload())
+
+    elif path == '/metrics':
+        await send_text(send, registry.render(), METRICS_CONTENT_TYPE)
+
+    elif path == '/ready':
+        ready, details = readiness()
+        await send_json(send, dict(details, ready=ready), 200 if ready else 503)
+
+    elif path == '/clear_pending':
+        if method != 'POST':
+            await send_empty(send, 405)
+        elif not token:
+            await send_json(send, {'error': 'Token required'}, 400)
+        else:
+            # The Bot API call is blocking; keep it off the event loop
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(handler_executor, clear_pending_updates, token)
+            await send_json(send, {'status': 'Pending updates cleared'})
+
+    else:
+        await send_json(send, {'error': 'Not found'}, 404)
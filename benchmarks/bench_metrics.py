@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: per-event cost of the metrics instrumentation
+
+    python benchmarks/bench_metrics.py [--iterations 500000]
+
+Prints one JSON object with ns/op for counter increments, histogram
+observations (cached child and labels() lookup), the timer context manager
+and a full /metrics render.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=500000)
+    args = parser.parse_args()
+
+    registry = Registry()
+    counter = registry.counter('bench_total', 'Benchmark counter', ['command', 'outcome'])
+    histogram = registry.histogram('bench_seconds', 'Benchmark histogram', ['command'])
+    commands = [f"cmd{i}" for i in range(20)]
+    for command in commands:
+        counter.labels(command, 'ok').inc()
+        histogram.labels(command).observe(0.01)
+
+    counter_child = counter.labels('cmd0', 'ok')
+    histogram_child = histogram.labels('cmd0')
+
+    def run(fn):
+        start = time.perf_counter()
+        for i in range(args.iterations):
+            fn(i)
+        return (time.perf_counter() - start) / args.iterations * 1e9
+
+    baseline_ns = run(lambda i: None)
+
+    def timed(i):
+        with histogram_child.time():
+            pass
+
+    results = {
+        'counter_inc_ns': run(lambda i: counter_child.inc()),
+        'counter_labels_inc_ns': run(lambda i: counter.labels(commands[i % 20], 'ok').inc()),
+        'histogram_observe_ns': run(lambda i: histogram_child.observe(0.0042)),
+        'histogram_labels_observe_ns': run(lambda i: histogram.labels(commands[i % 20]).observe(0.0042)),
+        'histogram_timer_ns': run(timed),
+    }
+
+    start = time.perf_counter()
+    for _ in range(100):
+        body = registry.render()
+    render_us = (time.perf_counter() - start) / 100 * 1e6
+
+    print(json.dumps({
+        'benchmark': 'metrics',
+        'iterations': args.iterations,
+        'loop_overhead_ns': round(baseline_ns, 1),
+        **{name: round(value - baseline_ns, 1) for name, value in results.items()},
+        'render_us': round(render_us, 1),
+        'render_bytes': len(body)
+    }))
+
+
+if __name__ == '__main__':
+    main()
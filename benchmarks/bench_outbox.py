@@ -0,0 +1,115 @@
+"""
+Outbox benchmark: enqueue cost and drain throughput
+
+    python benchmarks/bench_outbox.py [--messages 2000] [--workers 4] [--send-latency 0.005] [--failure-rate 0.1]
+
+Enqueues --messages rows into a fresh SQLite outbox, timing each enqueue,
+then drains them with a fake sender that sleeps --send-latency seconds and
+fails --failure-rate of attempts with a retryable error. Prints one JSON
+object with enqueue latency percentiles, enqueue and drain throughput.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from outbox import Outbox
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def drain(outbox, total):
+    task = asyncio.create_task(outbox.run())
+    start = time.perf_counter()
+    while True:
+        by_status = outbox.stats()['by_status']
+        if by_status.get('sent', 0) + by_status.get('failed', 0) >= total:
+            break
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--send-latency', type=float, default=0.005)
+    parser.add_argument('--failure-rate', type=float, default=0.1)
+    args = parser.parse_args()
+
+    # Injected failures would log a retry warning each
+    logging.getLogger('outbox').setLevel(logging.ERROR)
+    rng = random.Random(42)
+
+    async def sender(row):
+        await asyncio.sleep(args.send_latency)
+        if rng.random() < args.failure_rate:
+            raise ConnectionError('injected failure')
+
+    path = os.path.join(tempfile.mkdtemp(prefix='bench-outbox-'), 'outbox.db')
+    outbox = Outbox(
+        path, sender, retryable=(ConnectionError,), workers=args.workers,
+        max_attempts=5, base_delay=0.001, max_delay=0.01, poll_interval=0.01
+    )
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.messages):
+        t = time.perf_counter()
+        outbox.enqueue(1, '15550000000', f"target{i % 50}", 'hello there', f"bench:{i}")
+        latencies.append(time.perf_counter() - t)
+    enqueue_elapsed = time.perf_counter() - start
+
+    # Re-enqueueing a known key must be cheap and must not add rows
+    t = time.perf_counter()
+    for i in range(min(500, args.messages)):
+        outbox.enqueue(1, '15550000000', f"target{i % 50}", 'hello there', f"bench:{i}")
+    duplicate_us = (time.perf_counter() - t) / min(500, args.messages) * 1e6
+
+    drain_elapsed = asyncio.run(drain(outbox, args.messages))
+    stats = outbox.stats()
+
+    print(json.dumps({
+        'benchmark': 'outbox',
+        'messages': args.messages,
+        'workers': args.workers,
+        'send_latency_s': args.send_latency,
+        'failure_rate': args.failure_rate,
+        'enqueue': {
+            'per_second': round(args.messages / enqueue_elapsed, 1),
+            'p50_us': round(percentile(latencies, 50) * 1e6, 1),
+            'p95_us': round(percentile(latencies, 95) * 1e6, 1),
+            'p99_us': round(percentile(latencies, 99) * 1e6, 1),
+            'mean_us': round(statistics.mean(latencies) * 1e6, 1),
+            'duplicate_key_us': round(duplicate_us, 1)
+        },
+        'drain': {
+            'seconds': round(drain_elapsed, 3),
+            'per_second': round(args.messages / drain_elapsed, 1),
+            'ideal_per_second': round(args.workers / args.send_latency, 1) if args.send_latency else None,
+            'sent': stats['by_status'].get('sent', 0),
+            'failed': stats['by_status'].get('failed', 0),
+            'retried': stats['retried']
+        }
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: linear startswith scan vs CommandRouter lookup
+
+    python benchmarks/bench_router.py [--commands 300] [--iterations 200000]
+
+Prints one JSON object with ns/op for both strategies.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import CommandRouter
+
+
+def handler(user_info, chat_id, message_text):
+    return message_text
+
+
+def linear_resolve(handlers, message_text):
+    for command, handle in handlers.items():
+        if message_text.startswith(command):
+            return handle
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--commands', type=int, default=300)
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--miss-ratio', type=float, default=0.1)
+    args = parser.parse_args()
+
+    names = [f"/cmd{i:04d}" for i in range(args.commands)]
+    handlers = {name: handler for name in names}
+    router = CommandRouter(bot_username='bench_bot')
+    for name in names:
+        router.register(name, handler)
+
+    rng = random.Random(42)
+    messages = []
+    for _ in range(1000):
+        if rng.random() < args.miss_ratio:
+            messages.append('/nosuchcommand with some arguments')
+        else:
+            messages.append(f"{rng.choice(names)} 1234567890 | target | hello there")
+
+    def run(fn):
+        start = time.perf_counter()
+        for i in range(args.iterations):
+            fn(messages[i % 1000])
+        return (time.perf_counter() - start) / args.iterations * 1e9
+
+    linear_ns = run(lambda text: linear_resolve(handlers, text))
+    router_ns = run(router.resolve)
+    unknown_ns = run(lambda text: router.unknown_response(text))
+
+    print(json.dumps({
+        'benchmark': 'command_routing',
+        'commands': args.commands,
+        'iterations': args.iterations,
+        'linear_scan_ns_per_op': round(linear_ns, 1),
+        'router_ns_per_op': round(router_ns, 1),
+        'unknown_response_ns_per_op': round(unknown_ns, 1),
+        'speedup': round(linear_ns / router_ns, 1)
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Startup-time benchmark: time until `import app` returns
+
+    python benchmarks/bench_startup.py [--runs 5] [--rpc-delay 2.0]
+
+A local stub answers the schema RPC after --rpc-delay seconds, standing in
+for a slow Supabase. Each scenario imports app in a fresh interpreter and
+reports median/min/max seconds as one JSON object.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time, sys; t = time.perf_counter(); import app; "
+    "sys.stdout.write(repr(time.perf_counter() - t))"
+)
+
+
+def start_stub(delay):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            time.sleep(delay)
+            body = b'[]'
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except BrokenPipeError:
+                # Background-bootstrap runs exit before the slow reply arrives
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_import(env):
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_SNIPPET],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--rpc-delay', type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = start_stub(args.rpc_delay)
+    manifest_dir = tempfile.mkdtemp(prefix='bench-startup-')
+    manifest_path = os.path.join(manifest_dir, 'manifest.json')
+
+    base_env = dict(
+        os.environ,
+        SUPABASE_URL=f"http://127.0.0.1:{server.server_port}",
+        HANDLER_MANIFEST=manifest_path,
+        PYTHONDONTWRITEBYTECODE='1'
+    )
+
+    scenarios = {
+        'schema_sync': {'SCHEMA_BOOTSTRAP': 'sync'},
+        'schema_background': {'SCHEMA_BOOTSTRAP': 'background'},
+        'schema_background_cold_manifest': {'SCHEMA_BOOTSTRAP': 'background', '_cold_manifest': True},
+    }
+
+    results = {}
+    for name, overrides in scenarios.items():
+        cold = overrides.pop('_cold_manifest', False)
+        env = dict(base_env, **overrides)
+        samples = []
+        for _ in range(args.runs):
+            if cold and os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            samples.append(time_import(env))
+        results[name] = {
+            'median_s': round(statistics.median(samples), 4),
+            'min_s': round(min(samples), 4),
+            'max_s': round(max(samples), 4)
+        }
+
+    server.shutdown()
+    print(json.dumps({
+        'benchmark': 'startup',
+        'runs': args.runs,
+        'rpc_delay_s': args.rpc_delay,
+        'results': results
+    }))
+
+
+if __name__ == '__main__':
+    main()
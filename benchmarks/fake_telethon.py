@@ -0,0 +1,195 @@
+"""
+In-process stand-in for telethon.TelegramClient with latency and error injection
+
+Implements the part of the client interface the bot uses (connect, login,
+get_me, get_input_entity, send_message, log_out). Use it with
+TelegramAccountManager(client_class=...) or by setting
+telegram_manager.client_class. Session strings are real StringSession
+strings, so they round-trip through the session store unchanged.
+
+    FakeTelegramClient.configure(latency=0.05, error_rate=0.01, flood_rate=0.001)
+    session_string = FakeTelegramClient.register_account('15550000001')
+"""
+import asyncio
+import hashlib
+import random
+import threading
+from types import SimpleNamespace
+
+from telethon.crypto import AuthKey
+from telethon.errors import FloodWaitError, PhoneCodeInvalidError, SessionPasswordNeededError
+from telethon.sessions import StringSession
+from telethon.tl.types import InputPeerUser
+
+# Relative cost of each call; connect is a full MTProto handshake
+LATENCY_WEIGHTS = {
+    'connect': 3.0,
+    'send_code_request': 2.0,
+    'sign_in': 2.0,
+    'get_me': 1.0,
+    'get_input_entity': 1.0,
+    'send_message': 1.0,
+    'is_user_authorized': 0.5,
+    'log_out': 1.0
+}
+
+# Codes /verify accepts; anything else raises PhoneCodeInvalidError
+VALID_CODE = '12345'
+
+
+def _auth_key(phone_number):
+    return AuthKey(hashlib.sha256(phone_number.encode()).digest() * 8)
+
+
+class FakeTelegramClient:
+    """Configuration and the account registry are class-wide so every client sees them"""
+
+    latency = 0.05
+    jitter = 0.5
+    error_rate = 0.0
+    flood_rate = 0.0
+    flood_seconds = 5
+    password_phones = set()
+    rng = random.Random(0)
+
+    _accounts = {}
+    _lock = threading.Lock()
+    calls = {}
+    injected_errors = 0
+    injected_floods = 0
+
+    def __init__(self, session, api_id=None, api_hash=None, **kwargs):
+        self.session = session if isinstance(session, StringSession) else StringSession(session)
+        self._connected = False
+        self._phone = None
+        self._code_phone = None
+
+    @classmethod
+    def configure(cls, latency=None, jitter=None, error_rate=None, flood_rate=None,
+                  flood_seconds=None, password_phones=None, seed=None):
+        if latency is not None:
+            cls.latency = latency
+        if jitter is not None:
+            cls.jitter = jitter
+        if error_rate is not None:
+            cls.error_rate = error_rate
+        if flood_rate is not None:
+            cls.flood_rate = flood_rate
+        if flood_seconds is not None:
+            cls.flood_seconds = flood_seconds
+        if password_phones is not None:
+            cls.password_phones = set(password_phones)
+        if seed is not None:
+            cls.rng = random.Random(seed)
+
+    @classmethod
+    def register_account(cls, phone_number):
+        """Create a signed-in account and return its session string"""
+        session = StringSession()
+        session.set_dc(2, '149.154.167.51', 443)
+        session.auth_key = _auth_key(phone_number)
+        session_string = session.save()
+        with cls._lock:
+            cls._accounts[session_string] = phone_number
+        return session_string
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            return {
+                'accounts': len(cls._accounts),
+                'calls': dict(cls.calls),
+                'injected_errors': cls.injected_errors,
+                'injected_floods': cls.injected_floods
+            }
+
+    async def _call(self, name, can_fail=True):
+        with self._lock:
+            FakeTelegramClient.calls[name] = FakeTelegramClient.calls.get(name, 0) + 1
+            roll = self.rng.random()
+            spread = self.rng.uniform(-self.jitter, self.jitter)
+        delay = self.latency * LATENCY_WEIGHTS.get(name, 1.0) * (1 + spread)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if not can_fail:
+            return
+        if roll < self.error_rate:
+            FakeTelegramClient.injected_errors += 1
+            raise ConnectionError(f"injected {name} failure")
+        if roll < self.error_rate + self.flood_rate:
+            FakeTelegramClient.injected_floods += 1
+            raise FloodWaitError(request=None, capture=self.flood_seconds)
+
+    def _account(self):
+        if self.session.auth_key is None:
+            return None
+        with self._lock:
+            return self._accounts.get(self.session.save())
+
+    async def connect(self):
+        await self._call('connect')
+        self._connected = True
+        self._phone = self._account()
+
+    def is_connected(self):
+        return self._connected
+
+    async def disconnect(self):
+        self._connected = False
+
+    async def is_user_authorized(self):
+        await self._call('is_user_authorized', can_fail=False)
+        return self._phone is not None
+
+    async def send_code_request(self, phone_number):
+        await self._call('send_code_request')
+        self._code_phone = phone_number
+        return SimpleNamespace(phone_code_hash=hashlib.md5(phone_number.encode()).hexdigest()[:16])
+
+    async def sign_in(self, phone=None, code=None, password=None, phone_code_hash=None):
+        await self._call('sign_in', can_fail=False)
+        phone = phone or self._code_phone
+        if password is None:
+            if str(code) != VALID_CODE:
+                raise PhoneCodeInvalidError(request=None)
+            if phone in self.password_phones:
+                self._code_phone = phone
+                raise SessionPasswordNeededError(request=None)
+        session_string = self.register_account(phone)
+        self.session = StringSession(session_string)
+        self._phone = phone
+        return self._me()
+
+    async def get_me(self):
+        await self._call('get_me')
+        return self._me()
+
+    def _me(self):
+        if self._phone is None:
+            return None
+        return SimpleNamespace(
+            id=int(self._phone[-9:]),
+            first_name='Bench',
+            last_name=self._phone[-4:],
+            username=f"bench{self._phone}",
+            phone=self._phone
+        )
+
+    async def get_input_entity(self, target):
+        await self._call('get_input_entity')
+        digest = hashlib.sha256(str(target).encode()).digest()
+        return InputPeerUser(
+            int.from_bytes(digest[:4], 'big'),
+            int.from_bytes(digest[4:12], 'big', signed=True)
+        )
+
+    async def send_message(self, entity, message):
+        await self._call('send_message')
+        return SimpleNamespace(id=self.rng.getrandbits(31), message=message)
+
+    async def log_out(self):
+        await self._call('log_out')
+        with self._lock:
+            self._accounts.pop(self.session.save(), None)
+        self._phone = None
+        return True
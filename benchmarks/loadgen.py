@@ -0,0 +1,273 @@
+"""
+End-to-end load test against the real webhook path, fully offline
+
+    python benchmarks/loadgen.py [--rate 50] [--duration 20] [--mix accounts=4,send=5,login=1]
+                                 [--users 50] [--accounts-per-user 3]
+                                 [--telethon-latency 0.05] [--telethon-error-rate 0] [--flood-rate 0]
+                                 [--supabase-latency 0.005] [--supabase-error-rate 0]
+
+Starts stub_postgrest.py in-process, seeds it with --users x
+--accounts-per-user sessions, swaps fake_telethon.FakeTelegramClient into
+the account manager and posts synthetic updates to handle_request at
+--rate per second (open loop: arrivals do not wait for replies). Operations:
+
+    accounts  /accounts for a random user
+    send      /send from one of the user's accounts to a random target
+    login     /login, the phone number, then /verify with the fake code
+
+Prints one JSON object: latency percentiles per request and per command,
+how far requests fell behind their scheduled start (queue_delay), achieved
+throughput, errors and process memory, for tracking regressions over time.
+Injected Telethon errors make the bot deactivate sessions exactly as it would
+in production, so long runs with --telethon-error-rate see more "Account not
+found" replies.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_telethon import FakeTelegramClient, VALID_CODE
+from stub_postgrest import start_stub
+
+LOGIN_ID_PATTERN = re.compile(r'/verify (\w+) ')
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def summarize(samples):
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+        'mean_ms': round(statistics.mean(samples) * 1000, 2),
+        'max_ms': round(max(samples) * 1000, 2)
+    }
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return None
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ('accounts', 'send', 'login'):
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class LoadGenerator:
+    def __init__(self, app_module, users, rng):
+        self.app = app_module
+        self.users = users
+        self.rng = rng
+        self.local = threading.local()
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.login_phones = itertools.count(1)
+        self.lock = threading.Lock()
+        self.samples = []
+        self.queue_delays = []
+        self.errors = {}
+
+    def client(self):
+        # Flask test clients keep per-client state; one per worker thread
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.app.test_client()
+        return self.local.client
+
+    def post(self, command, user_id, text):
+        update = {
+            'update_id': next(self.update_ids),
+            'message': {
+                'message_id': next(self.message_ids),
+                'chat': {'id': user_id},
+                'from': {'id': user_id, 'first_name': f"User{user_id}"},
+                'text': text
+            }
+        }
+        start = time.perf_counter()
+        response = self.client().post('/', json=update)
+        elapsed = time.perf_counter() - start
+        body = response.get_json(silent=True) or {}
+        reply = body.get('text') or ''
+        ok = response.status_code == 200 and not reply.lstrip().startswith('❌')
+        with self.lock:
+            self.samples.append((command, elapsed, ok))
+            if not ok:
+                key = f"{command}: {reply.strip().splitlines()[0][:80] if reply.strip() else response.status_code}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+        return reply
+
+    def run(self, operation, scheduled):
+        with self.lock:
+            self.queue_delays.append(max(0.0, time.perf_counter() - scheduled))
+        user_id, phones = self.rng.choice(self.users)
+        if operation == 'accounts':
+            self.post('accounts', user_id, '/accounts')
+        elif operation == 'send':
+            target = f"target{self.rng.randrange(1000)}"
+            self.post('send', user_id, f"/send {self.rng.choice(phones)} | {target} | load test message")
+        elif operation == 'login':
+            phone = f"1777{next(self.login_phones):07d}"
+            self.post('login', user_id, '/login')
+            reply = self.post('login_phone', user_id, phone)
+            match = LOGIN_ID_PATTERN.search(reply)
+            if match:
+                self.post('verify', user_id, f"/verify {match.group(1)} {VALID_CODE}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rate', type=float, default=50, help='operations started per second')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load')
+    parser.add_argument('--mix', default='accounts=4,send=5,login=1')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--accounts-per-user', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=64, help='webhook requests in flight')
+    parser.add_argument('--telethon-latency', type=float, default=0.05)
+    parser.add_argument('--telethon-error-rate', type=float, default=0.0)
+    parser.add_argument('--flood-rate', type=float, default=0.0)
+    parser.add_argument('--supabase-latency', type=float, default=0.005)
+    parser.add_argument('--supabase-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    server, stub_url, db = start_stub(
+        latency=args.supabase_latency, error_rate=args.supabase_error_rate, seed=args.seed
+    )
+    FakeTelegramClient.configure(
+        latency=args.telethon_latency, error_rate=args.telethon_error_rate,
+        flood_rate=args.flood_rate, seed=args.seed
+    )
+
+    users = []
+    for i in range(args.users):
+        user_id = 100000 + i
+        phones = []
+        for j in range(args.accounts_per_user):
+            phone = f"1555{i:04d}{j:03d}"
+            db.insert('telegram_sessions', {
+                'user_id': user_id,
+                'phone_number': phone,
+                'session_string': FakeTelegramClient.register_account(phone)
+            })
+            phones.append(phone)
+        users.append((user_id, phones))
+
+    # The app reads its configuration at import; pacing is opened up so the
+    # run measures the bot rather than SEND_RATE (override from the shell)
+    data_dir = tempfile.mkdtemp(prefix='bench-loadgen-')
+    os.environ.update(
+        SUPABASE_URL=stub_url,
+        SESSION_STORE='supabase',
+        LOCAL_DB_PATH=os.path.join(data_dir, 'bot.db'),
+        WEBHOOK_MODE='inline',
+        BOT_TOKEN='bench'
+    )
+    os.environ.setdefault('SCHEMA_BOOTSTRAP', 'sync')
+    os.environ.setdefault('SEND_RATE', '1000')
+    os.environ.setdefault('SEND_BURST', '1000')
+
+    rss_before_import = rss_mb()
+    import app
+    logging.getLogger().setLevel(logging.WARNING)
+    app.telegram_manager.client_class = FakeTelegramClient
+    app.background_loop.start()
+
+    generator = LoadGenerator(app, users, rng)
+    operations = list(mix)
+    weights = [mix[name] for name in operations]
+    total = int(args.rate * args.duration)
+    rss_start = rss_mb()
+
+    executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix='loadgen')
+    start = time.perf_counter()
+    for k in range(total):
+        scheduled = start + k / args.rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        executor.submit(generator.run, rng.choices(operations, weights)[0], scheduled)
+    executor.shutdown(wait=True)
+    elapsed = time.perf_counter() - start
+
+    samples = generator.samples
+    by_command = {}
+    for command, latency, ok in samples:
+        by_command.setdefault(command, []).append(latency)
+    failed = sum(1 for _, _, ok in samples if not ok)
+
+    print(json.dumps({
+        'benchmark': 'loadgen',
+        'config': {
+            'target_rate': args.rate,
+            'duration_s': args.duration,
+            'mix': mix,
+            'users': args.users,
+            'accounts_per_user': args.accounts_per_user,
+            'concurrency': args.concurrency,
+            'telethon_latency_s': args.telethon_latency,
+            'telethon_error_rate': args.telethon_error_rate,
+            'flood_rate': args.flood_rate,
+            'supabase_latency_s': args.supabase_latency,
+            'supabase_error_rate': args.supabase_error_rate
+        },
+        'operations': total,
+        'requests': len(samples),
+        'elapsed_s': round(elapsed, 3),
+        'throughput': {
+            'operations_per_s': round(total / elapsed, 2),
+            'requests_per_s': round(len(samples) / elapsed, 2)
+        },
+        'latency': summarize([latency for _, latency, _ in samples]),
+        'by_command': {command: summarize(values) for command, values in sorted(by_command.items())},
+        'queue_delay': summarize(generator.queue_delays),
+        'errors': {
+            'count': failed,
+            'rate': round(failed / len(samples), 4) if samples else 0,
+            'by_reply': dict(sorted(generator.errors.items(), key=lambda item: -item[1])[:10])
+        },
+        'memory': {
+            'rss_before_import_mb': round(rss_before_import, 1) if rss_before_import else None,
+            'rss_start_mb': round(rss_start, 1) if rss_start else None,
+            'rss_end_mb': round(rss_mb(), 1) if rss_start else None,
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        },
+        'telethon': FakeTelegramClient.stats(),
+        'supabase_requests': dict(sorted(db.requests.items())),
+        'client_pool': app.telegram_manager.client_pool.stats()
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+Local stand-in for the Supabase PostgREST endpoints the bot uses
+
+    python benchmarks/stub_postgrest.py [--port 54321] [--latency 0.01]
+
+Serves /rest/v1/telegram_sessions (GET/POST/PATCH/DELETE with col=eq.value
+and col=in.(a,b) filters; select, order, limit, offset and Prefer:
+count=exact on GET) and /rest/v1/rpc/execute_sql from memory. Point the bot at it with
+SUPABASE_URL=http://127.0.0.1:<port>. Every request sleeps --latency seconds
+and --error-rate of them answer 503, standing in for network and database
+time. loadgen.py starts one in-process with start_stub().
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+TABLES = ('telegram_sessions',)
+RESERVED_PARAMS = ('select', 'order', 'limit', 'offset')
+
+
+def _text(value):
+    """PostgREST compares filter values as text"""
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if value is None:
+        return 'null'
+    return str(value)
+
+
+class StubDatabase:
+    """In-memory rows per table, shared by every request thread"""
+
+    def __init__(self):
+        self.tables = {name: [] for name in TABLES}
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.sql_statements = 0
+
+    def count(self, key):
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def insert(self, table, row):
+        now = datetime.now().isoformat()
+        row = dict(row)
+        row.setdefault('id', f"{random.getrandbits(32):08x}")
+        row.setdefault('is_active', True)
+        row.setdefault('created_at', now)
+        row.setdefault('last_used', now)
+        with self.lock:
+            self.tables[table].append(row)
+        return row
+
+    def select(self, table, filters):
+        with self.lock:
+            return [dict(row) for row in self.tables[table] if self._matches(row, filters)]
+
+    def update(self, table, filters, fields):
+        with self.lock:
+            rows = [row for row in self.tables[table] if self._matches(row, filters)]
+            for row in rows:
+                row.update(fields)
+            return [dict(row) for row in rows]
+
+    def delete(self, table, filters):
+        with self.lock:
+            keep = [row for row in self.tables[table] if not self._matches(row, filters)]
+            removed = len(self.tables[table]) - len(keep)
+            self.tables[table] = keep
+            return removed
+
+    @staticmethod
+    def _matches(row, filters):
+        return all(_text(row.get(column)) in values for column, values in filters)
+
+
+def parse_filters(query):
+    """[(column, allowed values)] for col=eq.value and col=in.(a,b); other operators are rejected"""
+    filters = []
+    for name, value in parse_qsl(query, keep_blank_values=True):
+        if name in RESERVED_PARAMS:
+            continue
+        op, _, operand = value.partition('.')
+        if op == 'eq':
+            filters.append((name, {operand}))
+        elif op == 'in' and operand.startswith('(') and operand.endswith(')'):
+            filters.append((name, {item.strip('"') for item in operand[1:-1].split(',')}))
+        else:
+            raise ValueError(f"unsupported filter {name}={value}")
+    return filters
+
+
+def shape(rows, query):
+    """Apply order, limit, offset and select to matched rows"""
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    for term in reversed([t for t in params.get('order', '').split(',') if t]):
+        column, _, direction = term.partition('.')
+        rows.sort(key=lambda row: _text(row.get(column)), reverse=direction.startswith('desc'))
+    offset = int(params.get('offset') or 0)
+    limit = params.get('limit')
+    rows = rows[offset:offset + int(limit) if limit else None]
+    columns = params.get('select', '*')
+    if columns != '*':
+        names = columns.split(',')
+        rows = [{name: row.get(name) for name in names} for row in rows]
+    return rows, offset
+
+
+def make_handler(db, latency, error_rate, rng):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, payload=None, headers=None):
+            body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'null')
+
+        def _dispatch(self, method):
+            url = urlsplit(self.path)
+            body = self._read_json() if method in ('POST', 'PATCH') else None
+            db.count(f"{method} {url.path}")
+            if latency:
+                time.sleep(latency)
+            if error_rate and rng.random() < error_rate:
+                self._reply(503, {'message': 'injected failure'})
+                return
+
+            if url.path == '/rest/v1/rpc/execute_sql' and method == 'POST':
+                db.sql_statements += 1
+                self._reply(200, [])
+                return
+
+            prefix = '/rest/v1/'
+            table = url.path[len(prefix):] if url.path.startswith(prefix) else None
+            if table not in db.tables:
+                self._reply(404, {'message': f"relation {table} does not exist"})
+                return
+
+            try:
+                filters = parse_filters(url.query)
+            except ValueError as e:
+                self._reply(400, {'message': str(e)})
+                return
+
+            prefer = self.headers.get('Prefer') or ''
+            representation = 'return=representation' in prefer
+            if method == 'GET':
+                matched = db.select(table, filters)
+                rows, offset = shape(matched, url.query)
+                headers = None
+                if 'count=exact' in prefer:
+                    span = f"{offset}-{offset + len(rows) - 1}" if rows else '*'
+                    headers = {'Content-Range': f"{span}/{len(matched)}"}
+                self._reply(200, rows, headers)
+            elif method == 'POST':
+                rows = [db.insert(table, row) for row in (body if isinstance(body, list) else [body])]
+                self._reply(201, rows if representation else None)
+            elif method == 'PATCH':
+                rows = db.update(table, filters, body or {})
+                if representation:
+                    self._reply(200, rows)
+                else:
+                    self._reply(204)
+            elif method == 'DELETE':
+                db.delete(table, filters)
+                self._reply(204)
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+        def do_PATCH(self):
+            self._dispatch('PATCH')
+
+        def do_DELETE(self):
+            self._dispatch('DELETE')
+
+    return Handler
+
+
+def start_stub(host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, seed=None):
+    """Serve a stub on a daemon thread; returns (server, base_url, db)"""
+    db = StubDatabase()
+    rng = random.Random(seed)
+    server = ThreadingHTTPServer((host, port), make_handler(db, latency, error_rate, rng))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='stub-postgrest', daemon=True).start()
+    return server, f"http://{host}:{server.server_port}", db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url, _ = start_stub(args.host, args.port, args.latency, args.error_rate)
+    print(json.dumps({'stub': 'postgrest', 'url': url}), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
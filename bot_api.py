@@ -0,0 +1,87 @@
+"""
+Minimal Telegram Bot API client on a pooled HTTP session
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BotApiClient:
+    """Call Bot API methods out of band (outside the webhook reply)"""
+
+    def __init__(self, http, base_url='https://api.telegram.org'):
+        self.http = http
+        self.base_url = base_url.rstrip('/')
+
+    def call(self, token, method, payload=None, timeout=None):
+        """Call a Bot API method and return its result, or None on failure"""
+        try:
+            response = self.http.post(
+                f"{self.base_url}/bot{token}/{method}",
+                json=payload or {},
+                timeout=timeout
+            )
+            data = response.json()
+            if not data.get('ok'):
+                logger.error(f"Bot API {method} error: {response.status_code} {data.get('description')}")
+                return None
+            return data.get('result')
+        except Exception as e:
+            logger.error(f"Bot API {method} error: {e}")
+            return None
+
+    def send_reply(self, token, reply):
+        """Deliver a webhook-style reply dict ({'method': ..., ...}) through the API"""
+        payload = dict(reply)
+        method = payload.pop('method', None)
+        if not method:
+            return None
+        return self.call(token, method, payload)
+
+    def send_message(self, token, chat_id, text, parse_mode='HTML', reply_markup=None):
+        payload = {'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode}
+        if reply_markup:
+            payload['reply_markup'] = reply_markup
+        return self.call(token, 'sendMessage', payload)
+
+    def edit_message_text(self, token, chat_id, message_id, text, parse_mode='HTML', reply_markup=None):
+        payload = {'chat_id': chat_id, 'message_id': message_id, 'text': text, 'parse_mode': parse_mode}
+        if reply_markup:
+            payload['reply_markup'] = reply_markup
+        return self.call(token, 'editMessageText', payload)
+
+    def answer_callback_query(self, token, callback_query_id, text=None):
+        payload = {'callback_query_id': callback_query_id}
+        if text:
+            payload['text'] = text
+        return self.call(token, 'answerCallbackQuery', payload)
+
+    def download_file(self, token, file_id, max_size=None):
+        """Download an uploaded file by file_id; returns bytes, or None on failure or if too large"""
+        info = self.call(token, 'getFile', {'file_id': file_id})
+        if not info or not info.get('file_path'):
+            return None
+        if max_size and info.get('file_size', 0) > max_size:
+            logger.warning(f"File {file_id} is {info['file_size']} bytes, over the {max_size} limit")
+            return None
+        try:
+            response = self.http.get(f"{self.base_url}/file/bot{token}/{info['file_path']}")
+            if response.status_code != 200:
+                logger.error(f"Bot API file download error: {response.status_code}")
+                return None
+            return response.content
+        except Exception as e:
+            logger.error(f"Bot API file download error: {e}")
+            return None
+
+    def get_updates(self, token, offset=None, timeout=0, limit=100, allowed_updates=None):
+        payload = {'timeout': timeout, 'limit': limit}
+        if offset is not None:
+            payload['offset'] = offset
+        if allowed_updates is not None:
+            payload['allowed_updates'] = allowed_updates
+        # A long poll holds the request open for up to timeout seconds
+        return self.call(token, 'getUpdates', payload, timeout=timeout + 10 if timeout else None)
+
+    def delete_webhook(self, token, drop_pending_updates=False):
+        return self.call(token, 'deleteWebhook', {'drop_pending_updates': drop_pending_updates})
@@ -0,0 +1,204 @@
+"""
+In-process caches with TTL expiry and an LRU size bound
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after ttl seconds, bounded by maxsize (LRU)
+
+    on_evict(key, value) is called, outside the lock, for entries dropped by
+    expiry or the size bound, but not for explicit pop/del/invalidate.
+    """
+
+    def __init__(self, maxsize=1000, ttl=300, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Return a fresh value for key, or default"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = item
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+
+        self._evicted([(key, value)])
+        return default
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entries past maxsize"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                evicted.append((old_key, old_value))
+                self.evictions += 1
+        self._evicted(evicted)
+
+    def expire(self):
+        """Drop every expired entry now; returns how many were dropped"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [(key, item[1]) for key, item in self._data.items() if item[0] <= now]
+            for key, _ in expired:
+                del self._data[key]
+            self.expirations += len(expired)
+        self._evicted(expired)
+        return len(expired)
+
+    def _evicted(self, items):
+        if not self.on_evict:
+            return
+        for key, value in items:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                logger.warning(f"Cache eviction callback failed for {key!r}: {e}")
+
+    def pop(self, key, default=None):
+        """Remove key and return its value if still fresh"""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        if item is _MISSING:
+            return default
+        if item[0] <= time.monotonic():
+            self.expirations += 1
+            self._evicted([(key, item[1])])
+            return default
+        return item[1]
+
+    def invalidate(self, key):
+        """Drop key from the cache"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_matching(self, predicate):
+        """Drop every key for which predicate(key) is true"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        if item is _MISSING:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            return item is not _MISSING and item[0] > time.monotonic()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """Cache counters for health reporting"""
+        with self._lock:
+            size = len(self._data)
+        return {
+            'size': size,
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+class SessionLookupCache:
+    """Read-through cache of a user's active session rows, with negative entries for unknown phones"""
+
+    def __init__(self, maxsize=1000, ttl=60, negative_ttl=15):
+        self.negative_ttl = negative_ttl
+        self._lists = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._rows = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.negative_hits = 0
+
+    def get_user_sessions(self, user_id):
+        """Return the cached active sessions for user_id, or None on a miss"""
+        sessions = self._lists.get(user_id)
+        return list(sessions) if sessions is not None else None
+
+    def set_user_sessions(self, user_id, sessions):
+        self._lists.set(user_id, list(sessions))
+
+    def lookup_phone(self, user_id, phone_number):
+        """Return (hit, session); session is None for a cached negative lookup"""
+        row = self._rows.get((user_id, phone_number), _MISSING)
+        if row is not _MISSING:
+            if row is None:
+                self.negative_hits += 1
+            return True, row
+
+        # A cached session list is authoritative for the phone lookup too
+        sessions = self._lists.get(user_id)
+        if sessions is not None:
+            row = next((s for s in sessions if s.get('phone_number') == phone_number), None)
+            if row is None:
+                self.negative_hits += 1
+            return True, row
+
+        return False, None
+
+    def set_phone(self, user_id, phone_number, session):
+        """Cache a phone lookup; a None session is stored as a short-lived negative entry"""
+        ttl = self.negative_ttl if session is None else None
+        self._rows.set((user_id, phone_number), session, ttl=ttl)
+
+    def invalidate_user(self, user_id):
+        """Forget everything cached for user_id after a write"""
+        self._lists.invalidate(user_id)
+        self._rows.invalidate_matching(lambda key: key[0] == user_id)
+
+    def stats(self):
+        return {
+            'lists': self._lists.stats(),
+            'phones': self._rows.stats(),
+            'negative_hits': self.negative_hits
+        }
@@ -0,0 +1,276 @@
+"""
+Pool of connected Telethon clients keyed by stored session
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class PooledClient:
+    def __init__(self, client, loop):
+        self.client = client
+        self.loop = loop
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+        self.uses = 0
+        # Callers currently using the client; leased entries are never evicted
+        self.leases = 0
+        # Dropped from the pool while leased; closed when the last lease ends
+        self.retired = False
+
+
+class ClientPool:
+    """Keep Telethon clients connected between calls so hot accounts skip the handshake
+
+    acquire() leases a client until release(); call() does both. Only
+    unleased clients are evicted, so with more than max_size sessions in
+    use at once the pool grows past max_size until they are released.
+    """
+
+    def __init__(self, client_factory, max_size=20, idle_timeout=300, health_check_interval=60, observer=None):
+        self.client_factory = client_factory
+        # observer('connect', seconds, ok) is called for every new connection
+        self.observer = observer
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._entries = OrderedDict()
+        self._leased = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.connection_errors = 0
+
+    async def acquire(self, key, session_string):
+        """Lease a connected client for the session, reusing a warm one when possible
+
+        Every acquire() must be paired with release(key, client).
+        """
+        loop = asyncio.get_running_loop()
+        await self.evict_idle()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._lease(entry)
+
+        if entry is not None:
+            if entry.loop is loop and await self._is_healthy(entry):
+                entry.last_used = time.monotonic()
+                entry.uses += 1
+                self.hits += 1
+                return entry.client
+            await self.release(key, entry.client, discard=True)
+
+        self.misses += 1
+        client = await self.client_factory(session_string)
+        start = time.perf_counter()
+        ok = False
+        try:
+            try:
+                await client.connect()
+            except BaseException:
+                # Failed or cancelled mid-connect; the socket may already be open
+                await client.disconnect()
+                raise
+            ok = True
+        finally:
+            if self.observer:
+                self.observer('connect', time.perf_counter() - start, ok)
+
+        entry = PooledClient(client, loop)
+        entry.uses = 1
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current.loop is loop and current.client.is_connected():
+                # Another caller connected this session meanwhile; keep theirs
+                current.last_used = time.monotonic()
+                current.uses += 1
+                self._lease(current)
+                raced = True
+            else:
+                raced = False
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._lease(entry)
+                if current is not None and current.leases:
+                    current.retired = True
+                    current = None
+            overflow = self._take_overflow()
+
+        if raced:
+            await self._close(entry)
+            client = current.client
+        elif current is not None:
+            await self._close(current)
+        for old in overflow:
+            self.evictions += 1
+            await self._close(old)
+
+        return client
+
+    async def release(self, key, client, discard=False):
+        """End a lease from acquire(); discard=True also drops the client from the pool
+
+        A discarded client still leased by other callers is closed when the
+        last of them releases it.
+        """
+        with self._lock:
+            entry = self._leased.get(id(client))
+            if entry is None:
+                return
+            if discard and self._entries.get(key) is entry:
+                del self._entries[key]
+                entry.retired = True
+            entry.leases -= 1
+            if entry.leases:
+                return
+            del self._leased[id(client)]
+            close = entry.retired
+            overflow = self._take_overflow()
+
+        if close:
+            await self._close(entry)
+        for old in overflow:
+            self.evictions += 1
+            await self._close(old)
+
+    async def call(self, key, session_string, fn):
+        """Run fn(client) on a pooled client, dropping the client if its connection failed
+
+        fn is not run again: the request may already have reached Telegram
+        (a sent message, a log_out), so retrying is left to the caller.
+        """
+        client = await self.acquire(key, session_string)
+        discard = False
+        try:
+            return await fn(client)
+        except (ConnectionError, OSError) as e:
+            logger.warning(f"Pooled client {key} failed ({e}), dropping it")
+            self.connection_errors += 1
+            discard = True
+            raise
+        finally:
+            await self.release(key, client, discard=discard)
+
+    async def discard(self, key, entry=None):
+        """Drop a session from the pool and disconnect its client (once no caller is using it)"""
+        with self._lock:
+            current = self._entries.get(key)
+            if entry is None or current is entry:
+                current = self._entries.pop(key, None)
+            else:
+                current = None
+            if entry is None:
+                entry = current
+            if entry is not None and entry.leases:
+                entry.retired = True
+                entry = None
+        if entry is not None:
+            await self._close(entry)
+
+    async def evict_idle(self):
+        """Disconnect unleased clients that have not been used within idle_timeout"""
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [
+                key for key, entry in self._entries.items()
+                if entry.last_used < deadline and not entry.leases
+            ]
+            expired = [self._entries.pop(key) for key in idle]
+
+        for entry in expired:
+            self.evictions += 1
+            await self._close(entry)
+
+        return len(expired)
+
+    async def run_sweeper(self, interval=60):
+        """Evict idle clients every interval seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = await self.evict_idle()
+                if evicted:
+                    logger.info(f"Evicted {evicted} idle Telegram clients")
+            except Exception as e:
+                logger.warning(f"Client pool sweep failed: {e}")
+
+    async def close_all(self):
+        """Disconnect every pooled client"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+
+        for entry in entries:
+            await self._close(entry)
+
+    def stats(self):
+        """Pool counters for health reporting"""
+        with self._lock:
+            size = len(self._entries)
+            leased = len(self._leased)
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'leased': leased,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'connection_errors': self.connection_errors
+        }
+
+    def _lease(self, entry):
+        # Caller holds self._lock
+        entry.leases += 1
+        self._leased[id(entry.client)] = entry
+
+    def _take_overflow(self):
+        # Caller holds self._lock; least recently used unleased entries first
+        excess = len(self._entries) - self.max_size
+        overflow = []
+        if excess <= 0:
+            return overflow
+        for key, entry in list(self._entries.items()):
+            if not entry.leases:
+                overflow.append(self._entries.pop(key))
+                if len(overflow) >= excess:
+                    break
+        return overflow
+
+    async def _is_healthy(self, entry):
+        if not entry.client.is_connected():
+            return False
+
+        if time.monotonic() - entry.last_checked < self.health_check_interval:
+            return True
+
+        try:
+            healthy = await entry.client.is_user_authorized()
+        except Exception as e:
+            logger.warning(f"Pooled client health check failed: {e}")
+            return False
+
+        entry.last_checked = time.monotonic()
+        return healthy
+
+    async def _close(self, entry):
+        try:
+            if entry.loop is asyncio.get_running_loop():
+                await entry.client.disconnect()
+            elif entry.loop.is_running():
+                asyncio.run_coroutine_threadsafe(_disconnect(entry.client), entry.loop)
+            # Clients on a stopped loop cannot be awaited; their sockets close with the loop
+        except Exception as e:
+            logger.warning(f"Error disconnecting pooled client: {e}")
+
+
+async def _disconnect(client):
+    await client.disconnect()
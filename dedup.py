@@ -0,0 +1,98 @@
+"""
+Idempotency cache for webhook updates keyed by update_id
+"""
+import os
+import time
+
+from cache import TTLCache
+
+NEW = 'new'
+DONE = 'done'
+IN_PROGRESS = 'in_progress'
+
+
+class UpdateDeduplicator:
+    """Answer redelivered updates without handling them again
+
+    The first delivery of an update claims its key in the shared namespace
+    (a StateNamespace, so every worker using the same state store sees it)
+    for running_ttl seconds; when it finishes the reply is kept for ttl
+    seconds. A repeat delivery gets that reply, or IN_PROGRESS while the
+    first one is still running. Replies are also kept in a bounded local
+    cache so repeats on the same worker skip the shared store. A claim whose
+    worker died runs out after running_ttl and the update is handled again.
+    """
+
+    def __init__(self, shared, ttl=3600, running_ttl=300, maxsize=10000):
+        self.shared = shared
+        self.ttl = ttl
+        self.running_ttl = running_ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.checked = 0
+        self.duplicates = {DONE: 0, IN_PROGRESS: 0}
+        self.abandoned = 0
+
+    @staticmethod
+    def key(token, update):
+        """Dedup key, or None for updates without an update_id
+
+        update_id is only unique per bot; the numeric bot id (the part of the
+        token before ':') keeps the secret itself out of the store.
+        """
+        update_id = update.get('update_id') if isinstance(update, dict) else None
+        if update_id is None:
+            return None
+        bot_id = (token or '').split(':', 1)[0]
+        return f"{bot_id}:{update_id}"
+
+    def begin(self, key):
+        """Claim an update; returns (NEW, None), (DONE, reply) or (IN_PROGRESS, None)"""
+        if key is None:
+            return NEW, None
+        self.checked += 1
+
+        cached = self.local.get(key)
+        if cached is not None:
+            self.duplicates[DONE] += 1
+            return DONE, cached['reply']
+
+        claim = {'status': 'running', 'pid': os.getpid(), 'started_at': time.time()}
+        if self.shared.add(key, claim, ttl=self.running_ttl):
+            return NEW, None
+
+        record = self.shared.get(key)
+        if record is None:
+            # Finished and expired between the two calls; treat it as handled
+            self.duplicates[DONE] += 1
+            return DONE, None
+        if record.get('status') == 'done':
+            self.local.set(key, record)
+            self.duplicates[DONE] += 1
+            return DONE, record.get('reply')
+        self.duplicates[IN_PROGRESS] += 1
+        return IN_PROGRESS, None
+
+    def finish(self, key, reply):
+        """Keep the reply so redeliveries get it instead of a second run"""
+        if key is None:
+            return
+        record = {'status': 'done', 'reply': reply, 'finished_at': time.time()}
+        self.shared.set(key, record)
+        self.local.set(key, record)
+
+    def abandon(self, key):
+        """Release a claim whose handling failed, so a redelivery runs again"""
+        if key is None:
+            return
+        self.shared.pop(key)
+        self.abandoned += 1
+
+    def stats(self):
+        return {
+            'checked': self.checked,
+            'duplicates': dict(self.duplicates),
+            'abandoned': self.abandoned,
+            'local': self.local.stats(),
+            'ttl': self.ttl,
+            'running_ttl': self.running_ttl
+        }
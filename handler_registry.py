@@ -0,0 +1,127 @@
+"""
+Handler manifest: discover command handlers without importing them
+"""
+import ast
+import importlib.util
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class LazyHandler:
+    """Stand-in for a handler's handle() that imports the module on first use"""
+
+    def __init__(self, command_name, path, is_async=False):
+        self.command_name = command_name
+        self.path = path
+        self.is_async = is_async
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import the handler module (once) and return its handle function"""
+        if self._handle is None:
+            with self._lock:
+                if self._handle is None:
+                    spec = importlib.util.spec_from_file_location(self.command_name, self.path)
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                    self._handle = module.handle
+        return self._handle
+
+    @property
+    def loaded(self):
+        return self._handle is not None
+
+    def __call__(self, *args):
+        return self.load()(*args)
+
+    def __repr__(self):
+        return f"<LazyHandler /{self.command_name} loaded={self.loaded}>"
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def scan_handler(path):
+    """Read handle()/ALIASES from a handler file's AST; returns None if there is no handle()"""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    entry = None
+    aliases = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == 'handle':
+            entry = {'is_async': isinstance(node, ast.AsyncFunctionDef)}
+        elif isinstance(node, ast.Assign):
+            if any(isinstance(t, ast.Name) and t.id == 'ALIASES' for t in node.targets):
+                try:
+                    aliases = list(ast.literal_eval(node.value))
+                except ValueError:
+                    logger.warning(f"⚠️ ALIASES in {path} is not a literal, ignoring")
+
+    if entry is not None:
+        entry['aliases'] = aliases
+    return entry
+
+
+def build_manifest(handlers_path):
+    """Scan every handler file in handlers_path"""
+    files = {}
+    for filename in sorted(os.listdir(handlers_path)):
+        if not filename.endswith('.py') or filename == '__init__.py':
+            continue
+        path = os.path.join(handlers_path, filename)
+        try:
+            entry = scan_handler(path)
+        except Exception as e:
+            logger.error(f"❌ Error scanning handler {filename}: {e}")
+            entry = None
+        files[filename] = {'signature': file_signature(path), 'handler': entry}
+    return {'version': MANIFEST_VERSION, 'files': files}
+
+
+def manifest_is_fresh(manifest, handlers_path):
+    if not manifest or manifest.get('version') != MANIFEST_VERSION:
+        return False
+
+    current = sorted(
+        f for f in os.listdir(handlers_path) if f.endswith('.py') and f != '__init__.py'
+    )
+    if current != sorted(manifest['files'].keys()):
+        return False
+
+    return all(
+        manifest['files'][f]['signature'] == file_signature(os.path.join(handlers_path, f))
+        for f in current
+    )
+
+
+def load_manifest(handlers_path, manifest_path):
+    """Return the handler manifest, rebuilding and caching it when handler files changed"""
+    manifest = None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    if manifest_is_fresh(manifest, handlers_path):
+        return manifest, True
+
+    manifest = build_manifest(handlers_path)
+    try:
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, manifest_path)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not write handler manifest {manifest_path}: {e}")
+    return manifest, False
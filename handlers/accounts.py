@@ -1,17 +1,38 @@
-from app import telegram_manager, run_async
+from app import telegram_manager, run_async, ACCOUNTS_PAGE_SIZE
+
+def page_keyboard(page, pages):
+    """Prev/Next buttons; each press re-runs /accounts for that page"""
+    buttons = []
+    if page > 1:
+        buttons.append({'text': '⬅️ Prev', 'callback_data': f"/accounts {page - 1}"})
+    if page < pages:
+        buttons.append({'text': 'Next ➡️', 'callback_data': f"/accounts {page + 1}"})
+    return {'inline_keyboard': [buttons]} if buttons else None
 
 def handle(user_info, chat_id, message_text):
-    """Handle /accounts command - show logged in accounts"""
+    """Handle /accounts command - show logged in accounts, one page at a time"""
     
     user_id = user_info.get('id')
     first_name = user_info.get('first_name', 'User')
     
-    # Get user accounts using run_async helper
-    accounts = run_async(
-        telegram_manager.get_user_accounts(user_id)
+    parts = message_text.split()
+    page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+    page = max(page, 1)
+    
+    # Get one page of user accounts using run_async helper
+    accounts, total = run_async(
+        telegram_manager.get_accounts_page(user_id, ACCOUNTS_PAGE_SIZE, (page - 1) * ACCOUNTS_PAGE_SIZE)
     )
     
-    if not accounts:
+    pages = max(1, -(-total // ACCOUNTS_PAGE_SIZE))
+    if page > pages:
+        # Past the end (accounts were removed since the buttons were sent)
+        page = pages
+        accounts, total = run_async(
+            telegram_manager.get_accounts_page(user_id, ACCOUNTS_PAGE_SIZE, (page - 1) * ACCOUNTS_PAGE_SIZE)
+        )
+    
+    if not accounts and not total:
         return """
 📭 <b>No Accounts Found</b>
 
@@ -29,7 +50,7 @@ Then follow the steps:
 """
     
     accounts_text = ""
-    for i, account in enumerate(accounts, 1):
+    for i, account in enumerate(accounts, (page - 1) * ACCOUNTS_PAGE_SIZE + 1):
         status = "✅" if account.get('is_active', True) else "❌"
         accounts_text += f"""
 {i}. {status} <b>{account['name']}</b>
@@ -44,7 +65,8 @@ Then follow the steps:
 📊 <b>Your Telegram Accounts</b>
 
 👤 <b>User:</b> {first_name}
-📈 <b>Total Accounts:</b> {len(accounts)}
+📈 <b>Total Accounts:</b> {total}
+📄 <b>Page:</b> {page}/{pages}
 
 {accounts_text}
 
@@ -55,4 +77,4 @@ Then follow the steps:
 • <code>/fulllogout phone</code> - Complete logout (all devices)
 
 🔐 <b>Add more accounts:</b> <code>/login</code>
-"""
\ No newline at end of file
+""", page_keyboard(page, pages)
\ No newline at end of file
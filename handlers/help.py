@@ -8,11 +8,12 @@ def handle(user_info, chat_id, message_text):
 • <b>/login</b> - Login to Telegram account
 • <b>/verify</b> - Verify login code  
 • <b>/password</b> - Verify 2FA password
-• <b>/accounts</b> - Show all logged in accounts
+• <b>/accounts [page]</b> - Show logged in accounts, page by page
 • <b>/use</b> - Switch to specific account
 
 📤 <b>Messaging:</b>
 • <b>/send</b> - Send message via account
+• <b>/sendbatch</b> - Send many messages via one account
 
 🚪 <b>Logout Options:</b>
 • <b>/logout</b> - Logout from bot only
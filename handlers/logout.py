@@ -1,4 +1,4 @@
-from app import supabase
+from app import session_store, telegram_manager, run_async
 
 def handle(user_info, chat_id, message_text):
     """Handle /logout command - logout from account (bot only)"""
@@ -28,7 +28,7 @@ def handle(user_info, chat_id, message_text):
     user_id = user_info.get('id')
     
     # Get session to deactivate
-    session = supabase.get_session_by_phone(user_id, phone_number)
+    session = session_store.get_session_by_phone(user_id, phone_number)
     
     if not session:
         return f"""
@@ -40,9 +40,11 @@ def handle(user_info, chat_id, message_text):
 """
     
     # Deactivate session (bot only)
-    success = supabase.deactivate_session(session['id'], user_id)
+    success = session_store.deactivate_session(session['id'], user_id)
     
     if success:
+        # Disconnect its pooled client instead of leaving it until idle eviction
+        run_async(telegram_manager.client_pool.discard(session['id']))
         return f"""
 ✅ <b>Logout Successful</b>
 
@@ -1,4 +1,4 @@
-from app import telegram_manager, run_async
+from app import telegram_manager, run_async, current_message
 
 def handle(user_info, chat_id, message_text):
     """Handle /send command - send message via specific account"""
@@ -37,9 +37,13 @@ def handle(user_info, chat_id, message_text):
     
     user_id = user_info.get('id')
     
+    # A redelivered update maps to the same outbox row instead of a second send
+    message_id = current_message().get('message_id')
+    idempotency_key = f"send:{chat_id}:{message_id}" if message_id else None
+    
     # Send message using run_async helper
     success, result = run_async(
-        telegram_manager.send_message_via_account(user_id, phone_number, target, message)
+        telegram_manager.send_message_via_account(user_id, phone_number, target, message, idempotency_key)
     )
     
     return result
\ No newline at end of file
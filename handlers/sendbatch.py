@@ -0,0 +1,160 @@
+import asyncio
+import html
+import time
+
+from app import (
+    telegram_manager, bot_api, background_loop, run_async, current_bot_token, current_message,
+    SENDBATCH_MAX_ROWS, SENDBATCH_PROGRESS_INTERVAL, SENDBATCH_MAX_FILE_SIZE
+)
+
+USAGE = """
+📦 <b>Batch Send</b>
+
+📝 <b>Usage:</b>
+<code>/sendbatch phone_number
+target | message
+target | message</code>
+
+📎 Or upload a .txt file of <code>target | message</code> lines
+with the caption <code>/sendbatch phone_number</code>
+
+💡 <b>Example:</b>
+<code>/sendbatch 1234567890
+username | Hello!
+channel_name | Update is live</code>
+
+⏳ Sends are paced to stay inside Telegram's limits; progress is
+shown in a single status message.
+"""
+
+# Telegram rejects messages over 4096 characters
+MAX_SUMMARY_LENGTH = 3800
+
+def parse_rows(lines):
+    """Split 'target | message' lines into rows; returns (rows, invalid line numbers)"""
+    rows = []
+    invalid = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        target, sep, message = line.partition('|')
+        if not sep or not target.strip() or not message.strip():
+            invalid.append(number)
+            continue
+        rows.append((target.strip(), message.strip()))
+    return rows, invalid
+
+def read_document(token):
+    """Text of the document attached to the current message, or None"""
+    document = current_message().get('document')
+    if not document or not token:
+        return None
+    data = bot_api.download_file(token, document['file_id'], max_size=SENDBATCH_MAX_FILE_SIZE)
+    if data is None:
+        return None
+    return data.decode('utf-8-sig', errors='replace')
+
+def progress_text(phone_number, done, failed, total):
+    return f"""
+📦 <b>Batch Send in progress</b>
+
+📱 <b>From:</b> +{phone_number}
+📊 <b>Progress:</b> {done}/{total} ({failed} failed)
+"""
+
+def summary_text(phone_number, results, invalid):
+    sent = sum(1 for _, ok, _ in results if ok)
+    lines = []
+    for index, (target, ok, error) in enumerate(results, 1):
+        if ok:
+            lines.append(f"✅ {index}. {html.escape(target)}")
+        else:
+            lines.append(f"❌ {index}. {html.escape(target)} — {html.escape(error)}")
+    if invalid:
+        lines.append(f"⚠️ Skipped invalid lines: {', '.join(str(n) for n in invalid)}")
+
+    text = f"""
+📦 <b>Batch Send Finished</b>
+
+📱 <b>From:</b> +{phone_number}
+✅ <b>Sent:</b> {sent}/{len(results)}
+❌ <b>Failed:</b> {len(results) - sent}
+
+"""
+    for shown, line in enumerate(lines):
+        if len(text) + len(line) > MAX_SUMMARY_LENGTH:
+            text += f"… and {len(lines) - shown} more"
+            break
+        text += line + "\n"
+    return text
+
+async def run_batch(token, chat_id, status_message_id, user_id, phone_number, rows, invalid):
+    """Send the batch, editing the status message as rows finish"""
+    state = {'last_edit': time.monotonic(), 'editing': False}
+
+    async def on_progress(done, failed, total):
+        # Edits are throttled; Telegram limits how often one message can change
+        now = time.monotonic()
+        if state['editing'] or done == total or now - state['last_edit'] < SENDBATCH_PROGRESS_INTERVAL:
+            return
+        state['editing'] = True
+        state['last_edit'] = now
+        try:
+            await asyncio.to_thread(
+                bot_api.edit_message_text, token, chat_id, status_message_id,
+                progress_text(phone_number, done, failed, total)
+            )
+        finally:
+            state['editing'] = False
+
+    try:
+        results = await telegram_manager.send_batch(user_id, phone_number, rows, on_progress)
+        if results is None:
+            text = "❌ <b>Account not found!</b>"
+        else:
+            text = summary_text(phone_number, results, invalid)
+    except Exception as e:
+        text = f"❌ <b>Batch send failed:</b> {html.escape(str(e))}"
+    await asyncio.to_thread(bot_api.edit_message_text, token, chat_id, status_message_id, text)
+
+def handle(user_info, chat_id, message_text):
+    """Handle /sendbatch command - send many messages via one account"""
+
+    header, _, body = message_text.partition('\n')
+    phone_number = header[len('/sendbatch'):].strip()
+    if not phone_number:
+        return USAGE
+
+    token = current_bot_token()
+    lines = body.splitlines()
+    document_text = read_document(token)
+    if document_text is not None:
+        lines += document_text.splitlines()
+    elif current_message().get('document'):
+        return f"❌ <b>Could not read the uploaded file!</b> Send a UTF-8 .txt file under {SENDBATCH_MAX_FILE_SIZE // 1024} KB."
+
+    rows, invalid = parse_rows(lines)
+    if not rows:
+        return "❌ <b>No rows to send!</b> Each line must be <code>target | message</code>."
+    if len(rows) > SENDBATCH_MAX_ROWS:
+        return f"❌ <b>Too many rows!</b> {len(rows)} given, the limit is {SENDBATCH_MAX_ROWS}."
+
+    user_id = user_info.get('id')
+
+    status = bot_api.send_message(token, chat_id, progress_text(phone_number, 0, 0, len(rows))) if token else None
+    if not status:
+        # No way to report progress out of band; send inline and reply with the summary
+        results = run_async(
+            telegram_manager.send_batch(user_id, phone_number, rows),
+            timeout=max(60, len(rows) * 10)
+        )
+        if results is None:
+            return "❌ <b>Account not found!</b>"
+        return summary_text(phone_number, results, invalid)
+
+    # The batch outlives this request; the status message carries the result
+    background_loop.submit(
+        run_batch(token, chat_id, status['message_id'], user_id, phone_number, rows, invalid)
+    )
+    return None
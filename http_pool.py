@@ -0,0 +1,252 @@
+"""
+Shared keep-alive HTTP sessions with bounded, jittered retries
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset([500, 502, 503, 504])
+
+# Safe to send twice. Other methods (POST, PATCH) may already have been
+# applied when a read times out or a 5xx comes back, so they are retried
+# only when the request never reached the server (connect errors) or on 503.
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+NOT_APPLIED_STATUSES = frozenset([503])
+
+
+def should_retry_status(method, status):
+    if status not in RETRY_STATUSES:
+        return False
+    return method in IDEMPOTENT_METHODS or status in NOT_APPLIED_STATUSES
+
+
+def was_not_sent(error):
+    """True when a requests error happened while connecting, before anything was sent"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    # NewConnectionError (refused, DNS) is a ConnectTimeoutError subclass
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class PooledHTTPSession:
+    """requests.Session wrapper that keeps connections alive and retries transient failures"""
+
+    def __init__(self, pool_size=10, connect_timeout=5, read_timeout=30,
+                 max_retries=2, backoff=0.25, max_backoff=5, observer=None):
+        self.pool_size = pool_size
+        self.observer = observer
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._adapters = [adapter]
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def request(self, method, url, timeout=None, operation=None, **kwargs):
+        """Send a request, retrying 5xx responses and connection errors with jittered backoff
+
+        Non-idempotent methods are only retried when they cannot have been
+        applied (see IDEMPOTENT_METHODS).
+
+        With an observer set, requests tagged with an operation name report
+        observer(operation, seconds, ok) once, retries included.
+        """
+        if operation is None or self.observer is None:
+            return self._request(method, url, timeout, **kwargs)
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = self._request(method, url, timeout, **kwargs)
+            ok = response.status_code < 400
+            return response
+        finally:
+            self.observer(operation, time.perf_counter() - start, ok)
+
+    def _request(self, method, url, timeout=None, **kwargs):
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            with self._lock:
+                self.requests += 1
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+                if not should_retry_status(method, response.status_code) or attempt >= self.max_retries:
+                    return response
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable = method in IDEMPOTENT_METHODS or was_not_sent(e)
+                if not retryable or attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                logger.warning(f"{method} {url} failed ({e}), retrying")
+
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            time.sleep(self.retry_delay(attempt))
+
+    def retry_delay(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def stats(self):
+        """Request counters and per-host connection pool usage"""
+        hosts = {}
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    'connections_opened': pool.num_connections,
+                    'requests': pool.num_requests,
+                    'idle': sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+                }
+
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'requests': self.requests,
+                'retries': self.retries,
+                'failures': self.failures,
+                'hosts': hosts
+            }
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncPooledHTTPSession:
+    """httpx.AsyncClient wrapper with the same pooling and retry policy as PooledHTTPSession"""
+
+    def __init__(self, pool_size=10, connect_timeout=5, read_timeout=30,
+                 max_retries=2, backoff=0.25, max_backoff=5, observer=None):
+        self.pool_size = pool_size
+        self.observer = observer
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        # httpx connection pools are bound to the loop that created them
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def client(self):
+        """Return the AsyncClient for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+                self._clients[loop] = client
+            return client
+
+    async def request(self, method, url, timeout=None, operation=None, **kwargs):
+        """Send a request, retrying 5xx responses and transport errors with jittered backoff"""
+        if operation is None or self.observer is None:
+            return await self._request(method, url, timeout, **kwargs)
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = await self._request(method, url, timeout, **kwargs)
+            ok = response.status_code < 400
+            return response
+        finally:
+            self.observer(operation, time.perf_counter() - start, ok)
+
+    async def _request(self, method, url, timeout=None, **kwargs):
+        client = self.client()
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        attempt = 0
+        while True:
+            with self._lock:
+                self.requests += 1
+            try:
+                response = await client.request(method, url, **kwargs)
+                if not should_retry_status(method, response.status_code) or attempt >= self.max_retries:
+                    return response
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying")
+            except httpx.TransportError as e:
+                # ConnectError/ConnectTimeout/PoolTimeout: nothing was sent
+                retryable = method in IDEMPOTENT_METHODS or isinstance(
+                    e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+                )
+                if not retryable or attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                logger.warning(f"{method} {url} failed ({e}), retrying")
+
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            await asyncio.sleep(self.retry_delay(attempt))
+
+    def retry_delay(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self.request('PATCH', url, **kwargs)
+
+    def stats(self):
+        """Request counters and number of per-loop clients"""
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'loops': len(self._clients),
+                'requests': self.requests,
+                'retries': self.retries,
+                'failures': self.failures
+            }
+
+    async def aclose(self):
+        """Close the client bound to the running loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,81 @@
+"""
+Bounded job queue drained by a pool of worker threads
+"""
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """Run handler(job) on worker threads; enqueue never blocks the caller"""
+
+    def __init__(self, handler, workers=8, maxsize=1000, name='job'):
+        self.handler = handler
+        self.workers = workers
+        self.name = name
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        """Start the workers if they are not running in this process"""
+        with self._lock:
+            if self._pid == os.getpid() and all(t.is_alive() for t in self._threads):
+                return
+            # Worker threads do not survive fork
+            self._threads = [
+                threading.Thread(target=self._work, name=f"{self.name}-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, job):
+        """Queue a job; returns False when the queue is full"""
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self.handler(job)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ {self.name} job failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Block until every queued job has been processed"""
+        self._queue.join()
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            'depth': self.depth(),
+            'maxsize': self._queue.maxsize,
+            'workers': self.workers,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'failed': self.failed,
+            'rejected': self.rejected
+        }
@@ -0,0 +1,113 @@
+"""
+Long-lived asyncio event loop running in a background thread
+"""
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """Run coroutines from any thread on one persistent event loop"""
+
+    def __init__(self, name='telegram-loop'):
+        self.name = name
+        self.loop = None
+        self.thread = None
+        self.on_start = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the loop thread if it is not running in this process"""
+        with self._lock:
+            if self.is_running() and self._pid == os.getpid():
+                return self.loop
+
+            # Threads do not survive fork, so a forked worker gets its own loop
+            started = threading.Event()
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(
+                target=self._run, args=(self.loop, started), name=self.name, daemon=True
+            )
+            self.thread.start()
+            started.wait()
+            self._pid = os.getpid()
+            logger.info(f"🔁 Background event loop started ({self.name})")
+
+            for factory in self.on_start:
+                asyncio.run_coroutine_threadsafe(factory(), self.loop)
+
+            return self.loop
+
+    def _run(self, loop, started):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive() and self.loop.is_running()
+
+    def in_loop_thread(self):
+        return self.thread is not None and threading.current_thread() is self.thread
+
+    def submit(self, coro):
+        """Schedule coro on the loop and return a concurrent.futures.Future"""
+        loop = self.start()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro, timeout=None):
+        """Run coro on the loop and block until it finishes or timeout expires"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run() called from the loop thread; await the coroutine instead")
+
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Operation timed out after {timeout}s")
+
+    async def run_async(self, coro):
+        """Await coro on the background loop from a different event loop"""
+        if self.in_loop_thread():
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def stop(self, timeout=5):
+        """Cancel the loop's pending tasks, then stop the loop and wait for its thread to exit"""
+        with self._lock:
+            if not self.is_running():
+                return
+            if not self.in_loop_thread():
+                future = asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self.loop)
+                try:
+                    future.result(timeout)
+                except Exception as e:
+                    logger.warning(f"⚠️ Error cancelling background tasks: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+
+    async def _cancel_tasks(self):
+        """Cancel every other task on the loop and wait until they have finished unwinding"""
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current and not task.done()]
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Task {task.get_name()} failed while stopping: {result}")
+        if tasks:
+            logger.info(f"🛑 Cancelled {len(tasks)} background tasks")
+        return len(tasks)
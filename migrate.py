@@ -0,0 +1,15 @@
+"""
+One-shot schema migration: create the telegram_sessions table and exit
+
+Run before starting the web process when SCHEMA_BOOTSTRAP=off:
+    python migrate.py
+"""
+import os
+import sys
+
+os.environ.setdefault('SCHEMA_BOOTSTRAP', 'off')
+
+from app import setup_tables
+
+if __name__ == '__main__':
+    sys.exit(0 if setup_tables() else 1)
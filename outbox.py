@@ -0,0 +1,240 @@
+"""
+Durable outbox for outgoing account messages
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from storage import open_sqlite
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT UNIQUE,
+    user_id INTEGER NOT NULL,
+    phone_number TEXT NOT NULL,
+    target TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+class Outbox:
+    """Record every send before it is attempted and retry it until it goes out
+
+    Rows move pending -> sending -> sent | failed. A claimed row holds a
+    lease; if the process dies mid-send the lease runs out and any worker
+    (including this one after a restart) picks the row up again, so
+    delivery is at-least-once. idempotency_key makes re-enqueueing the same
+    request (e.g. a redelivered webhook) a no-op.
+
+    sender(row) is an async callable that raises on failure. Exceptions in
+    retryable are retried with exponential backoff up to max_attempts; an
+    exception with a `wait` attribute (RateLimited) is not retried sooner
+    than that. Anything else fails the row at once.
+    """
+
+    def __init__(self, path, sender, retryable=(OSError,), workers=4, max_attempts=5,
+                 base_delay=2.0, max_delay=300.0, lease=120.0, poll_interval=1.0, retention=86400):
+        self.path = path
+        self.sender = sender
+        self.retryable = retryable
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._conn = open_sqlite(path)
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._loop = None
+        self.enqueued = 0
+        self.duplicates = 0
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+        with self._lock:
+            self._conn.executescript(OUTBOX_TABLE_SQL)
+
+    def enqueue(self, user_id, phone_number, target, message, idempotency_key=None):
+        """Append a send; returns (row, created). A known idempotency_key returns the existing row"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "INSERT INTO outbox (idempotency_key, user_id, phone_number, target, message, "
+                "next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (idempotency_key) DO NOTHING RETURNING *",
+                (idempotency_key, user_id, phone_number, target, message, now, now, now)
+            ).fetchone()
+            if row is not None:
+                self.enqueued += 1
+                return dict(row), True
+            row = self._conn.execute(
+                "SELECT * FROM outbox WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+        self.duplicates += 1
+        return dict(row), False
+
+    def claim(self, limit=1, row_id=None):
+        """Lease due rows (or one specific pending row) for sending"""
+        now = time.time()
+        with self._lock:
+            if row_id is not None:
+                rows = self._conn.execute(
+                    "UPDATE outbox SET status = 'sending', attempts = attempts + 1, "
+                    "lease_until = ?, updated_at = ? WHERE id = ? AND status = 'pending' RETURNING *",
+                    (now + self.lease, now, row_id)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "UPDATE outbox SET status = 'sending', attempts = attempts + 1, "
+                    "lease_until = ?, updated_at = ? WHERE id IN ("
+                    "  SELECT id FROM outbox"
+                    "  WHERE (status = 'pending' AND next_attempt_at <= ?)"
+                    "     OR (status = 'sending' AND lease_until < ?)"
+                    "  ORDER BY id LIMIT ?"
+                    ") RETURNING *",
+                    (now + self.lease, now, now, now, limit)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    async def deliver(self, row_id):
+        """Send one row now, from the caller; returns (status, error)"""
+        rows = self.claim(row_id=row_id)
+        if not rows:
+            return self.status(row_id)
+        return await self._attempt(rows[0])
+
+    async def _attempt(self, row):
+        try:
+            await self.sender(row)
+        except Exception as e:
+            return self._record_failure(row, e)
+        self._set(row['id'], status='sent', last_error=None, lease_until=None)
+        self.delivered += 1
+        return 'sent', None
+
+    def _record_failure(self, row, error):
+        message = str(error) or type(error).__name__
+        if isinstance(error, self.retryable) and row['attempts'] < self.max_attempts:
+            delay = self.backoff(row['attempts'])
+            delay = max(delay, getattr(error, 'wait', 0) or 0)
+            self._set(row['id'], status='pending', last_error=message, lease_until=None,
+                      next_attempt_at=time.time() + delay)
+            self.retried += 1
+            logger.warning(f"📮 Outbox #{row['id']} attempt {row['attempts']} failed ({message}), retrying in {delay:.0f}s")
+            self.notify()
+            return 'pending', message
+
+        self._set(row['id'], status='failed', last_error=message, lease_until=None)
+        self.failed += 1
+        logger.error(f"📮 Outbox #{row['id']} failed after {row['attempts']} attempts: {message}")
+        return 'failed', message
+
+    def backoff(self, attempts):
+        # Full jitter keeps a burst of failures from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempts - 1))))
+
+    def _set(self, row_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE outbox SET {assignments} WHERE id = ?", (*fields.values(), row_id)
+            )
+
+    def status(self, row_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, last_error FROM outbox WHERE id = ?", (row_id,)
+            ).fetchone()
+        return (row['status'], row['last_error']) if row else (None, None)
+
+    def notify(self):
+        """Wake the drain loop (safe from any thread)"""
+        if self._wakeup is None or self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass
+
+    async def run(self):
+        """Drain due rows until cancelled; replays leftovers from a previous run first"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        in_flight = set()
+        last_purge = 0.0
+
+        def finished(task):
+            in_flight.discard(task)
+            self._wakeup.set()
+
+        try:
+            while True:
+                self._wakeup.clear()
+                try:
+                    # Refill free worker slots as sends finish rather than batch by batch
+                    free = self.workers - len(in_flight)
+                    rows = self.claim(limit=free) if free > 0 else []
+                    for row in rows:
+                        task = asyncio.create_task(self._attempt(row))
+                        in_flight.add(task)
+                        task.add_done_callback(finished)
+                    if rows and len(rows) == free:
+                        continue
+
+                    if time.monotonic() - last_purge > 3600:
+                        last_purge = time.monotonic()
+                        self.purge()
+                except Exception as e:
+                    logger.error(f"Outbox drain error: {e}")
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Unfinished rows keep their lease and are replayed once it runs out
+            for task in in_flight:
+                task.cancel()
+
+    def purge(self):
+        """Drop sent and failed rows older than retention"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE status IN ('sent', 'failed') AND updated_at < ?",
+                (time.time() - self.retention,)
+            )
+        return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n, MIN(created_at) AS oldest FROM outbox GROUP BY status"
+            ).fetchall()
+        by_status = {row['status']: row['n'] for row in rows}
+        oldest_pending = next((row['oldest'] for row in rows if row['status'] == 'pending'), None)
+        return {
+            'by_status': by_status,
+            'oldest_pending_age': round(time.time() - oldest_pending, 1) if oldest_pending else 0,
+            'enqueued': self.enqueued,
+            'duplicates': self.duplicates,
+            'delivered': self.delivered,
+            'retried': self.retried,
+            'failed': self.failed
+        }
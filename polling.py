@@ -0,0 +1,210 @@
+"""
+Long-polling entry point: pull updates with getUpdates instead of a webhook
+
+Run with:  BOT_TOKEN=... python polling.py
+
+Needs no public HTTPS endpoint. Telegram refuses getUpdates while a webhook
+is set, so the runner deletes it first (pending updates are kept). Updates
+are fetched up to POLL_LIMIT at a time and handled on POLL_CONCURRENCY
+threads; updates from the same user run one after another in the order
+Telegram sent them. Replies go out through the Bot API, as in
+WEBHOOK_MODE=queue. SIGINT/SIGTERM stop fetching (within POLL_TIMEOUT
+seconds) and let fetched updates finish before exiting.
+"""
+import functools
+import logging
+import os
+import signal
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app import (
+    background_loop,
+    bot_api,
+    claim_update,
+    NEW_UPDATE,
+    POLL_CONCURRENCY,
+    POLL_LIMIT,
+    POLL_MAX_PENDING,
+    POLL_TIMEOUT,
+    run_update_job,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def update_sender(update):
+    """Ordering key for an update: its sender, else its chat, else None (unordered)"""
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        sender = value.get('from') or {}
+        if 'id' in sender:
+            return sender['id']
+        chat = value.get('chat') or {}
+        if 'id' in chat:
+            return f"chat:{chat['id']}"
+    return None
+
+
+class UpdatePoller:
+    """Long-poll getUpdates and hand each update to handle(update) on a thread pool
+
+    Each getUpdates call sends an offset one past the highest update_id
+    received, which confirms (and makes Telegram drop) everything before it.
+    Updates are queued per sender and a sender's queue is drained by one
+    thread at a time, so a user's updates never overtake each other while
+    different users run in parallel. Fetching pauses while max_pending
+    updates are unfinished.
+    """
+
+    def __init__(self, api, token, handle, timeout=30, limit=100, concurrency=8,
+                 max_pending=500, retry_delay=5):
+        self.api = api
+        self.token = token
+        self.handle = handle
+        self.timeout = timeout
+        self.limit = limit
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self.offset = None
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='poll')
+        self._chains = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._stopping = threading.Event()
+        self.polls = 0
+        self.poll_errors = 0
+        self.received = 0
+        self.handled = 0
+        self.failed = 0
+
+    def dispatch(self, update):
+        """Queue an update behind any unfinished ones from the same sender"""
+        sender = update_sender(update)
+        with self._cond:
+            self._pending += 1
+            if sender is not None:
+                chain = self._chains.get(sender)
+                if chain is not None:
+                    chain.append(update)
+                    return
+                self._chains[sender] = deque()
+        self._executor.submit(self._drain, sender, update)
+
+    def _drain(self, sender, update):
+        while True:
+            self._run(update)
+            if sender is None:
+                return
+            with self._cond:
+                chain = self._chains[sender]
+                if not chain:
+                    del self._chains[sender]
+                    return
+                update = chain.popleft()
+
+    def _run(self, update):
+        try:
+            self.handle(update)
+            self.handled += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Polled update {update.get('update_id')} error: {e}")
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def poll_once(self):
+        """Fetch one batch and dispatch it; returns the number of updates received"""
+        with self._cond:
+            while self._pending >= self.max_pending and not self._stopping.is_set():
+                self._cond.wait(1)
+
+        updates = self.api.get_updates(self.token, offset=self.offset, timeout=self.timeout, limit=self.limit)
+        self.polls += 1
+        if updates is None:
+            self.poll_errors += 1
+            self._stopping.wait(self.retry_delay)
+            return 0
+
+        for update in updates:
+            update_id = update.get('update_id')
+            if update_id is None:
+                continue
+            self.offset = max(self.offset or 0, update_id + 1)
+            self.received += 1
+            self.dispatch(update)
+        return len(updates)
+
+    def run(self):
+        """Poll until stop(), then wait for fetched updates and confirm them"""
+        while not self._stopping.is_set():
+            self.poll_once()
+        self.drain()
+
+    def stop(self):
+        """Stop after the current getUpdates call returns (safe from signal handlers)"""
+        self._stopping.set()
+
+    def drain(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending == 0)
+        self._executor.shutdown(wait=True)
+        if self.offset is not None:
+            # Confirm the last batch so the next start does not receive it again
+            self.api.get_updates(self.token, offset=self.offset, timeout=0, limit=1)
+
+    def stats(self):
+        with self._cond:
+            pending = self._pending
+            senders = len(self._chains)
+        return {
+            'offset': self.offset,
+            'polls': self.polls,
+            'poll_errors': self.poll_errors,
+            'received': self.received,
+            'handled': self.handled,
+            'failed': self.failed,
+            'pending': pending,
+            'active_senders': senders
+        }
+
+
+def handle_update(token, update):
+    """Handle a polled update unless it was already handled, and send the reply"""
+    _, state, _ = claim_update(token, update)
+    if state != NEW_UPDATE:
+        return
+    run_update_job((token, update))
+
+
+def main():
+    token = os.environ.get('BOT_TOKEN')
+    if not token:
+        logger.error("❌ BOT_TOKEN is required for polling")
+        return 1
+
+    if bot_api.delete_webhook(token) is None:
+        logger.warning("⚠️ Could not delete the webhook; getUpdates fails while one is set")
+
+    background_loop.start()
+    poller = UpdatePoller(
+        bot_api, token, functools.partial(handle_update, token),
+        timeout=POLL_TIMEOUT, limit=POLL_LIMIT, concurrency=POLL_CONCURRENCY,
+        max_pending=POLL_MAX_PENDING
+    )
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: poller.stop())
+
+    logger.info(f"🚀 Polling for updates ({POLL_LIMIT} per batch, {POLL_CONCURRENCY} threads)")
+    poller.run()
+    logger.info(f"🛑 Polling stopped: {poller.stats()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Command routing table
+"""
+
+
+class CommandRouter:
+    """Map the command word of a message to its handler with one dict lookup"""
+
+    def __init__(self, bot_username=None):
+        self.handlers = {}
+        self.aliases = {}
+        self.bot_username = bot_username.lstrip('@').lower() if bot_username else None
+        self._unknown_parts = None
+
+    def register(self, command, handler, aliases=()):
+        """Register handler under /command and any aliases"""
+        command = self._normalize(command)
+        self.handlers[command] = handler
+        for alias in aliases:
+            self.aliases[self._normalize(alias)] = command
+        self._unknown_parts = None
+
+    def resolve(self, message_text):
+        """Return (command, handler, text) for a message, or (None, None, message_text) on a miss
+
+        text has the command word rewritten to its canonical form, so
+        '/Send@MyBot 123 | a | b' reaches the /send handler as '/send 123 | a | b'.
+        A command addressed to another bot ('/help@OtherBot') returns
+        (None, None, None): it is not for us and should get no reply.
+        """
+        if not message_text.startswith('/'):
+            return None, None, message_text
+
+        word = message_text.split(None, 1)[0]
+        end = len(word)
+
+        name, _, bot = word.partition('@')
+        if bot and self.bot_username and bot.lower() != self.bot_username:
+            # Addressed to another bot in the same group
+            return None, None, None
+
+        name = name.lower()
+        command = self.aliases.get(name, name)
+        handler = self.handlers.get(command)
+        if handler is None:
+            return None, None, message_text
+
+        return command, handler, command + message_text[end:]
+
+    def unknown_response(self, message_text):
+        """Reply for a message that matched no command"""
+        if self._unknown_parts is None:
+            self._unknown_parts = self._build_unknown_parts()
+        head, tail = self._unknown_parts
+        if tail is None:
+            return head
+        return head + message_text + tail
+
+    def _build_unknown_parts(self):
+        # Built once per registry change; only the echoed message varies per miss
+        available_commands = "\n".join([f"• <code>{cmd}</code>" for cmd in self.handlers.keys()])
+        if not available_commands:
+            return "❌ <b>No commands loaded!</b> Check server logs.", None
+        head = "\n❌ <b>Unknown Command:</b> <code>"
+        tail = (
+            "</code>\n\n"
+            "📋 <b>Available Commands:</b>\n"
+            f"{available_commands}\n\n"
+            "💡 <b>Help:</b> <code>/help</code>\n"
+        )
+        return head, tail
+
+    def _normalize(self, command):
+        command = command.lower()
+        return command if command.startswith('/') else f"/{command}"
+
+    def __contains__(self, command):
+        return command in self.handlers
+
+    def __len__(self):
+        return len(self.handlers)
+
+    def get(self, command, default=None):
+        return self.handlers.get(command, default)
+
+    def commands(self):
+        return list(self.handlers.keys())
@@ -0,0 +1,159 @@
+"""
+Per-account send pacing with flood-wait parking
+"""
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """Raised when an account could not send within the caller's max_wait"""
+
+    def __init__(self, key, wait):
+        super().__init__(f"account {key} is rate limited for {wait:.0f}s")
+        self.key = key
+        self.wait = wait
+
+
+class AccountBucket:
+    """Token bucket for one account, kept as a theoretical arrival time
+
+    A send is allowed once now >= tat - (burst - 1) * interval, which is
+    the same as holding a token in a bucket of `burst` tokens refilled at
+    `rate` per second. Each send reserves its slot up front, so waiters go
+    out in arrival order without holding a lock across the sleep.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tat = 0.0
+        self.parked_until = 0.0
+        self.queued = 0
+        self.sent = 0
+        self.flood_waits = 0
+
+    @property
+    def interval(self):
+        return 1.0 / self.rate if self.rate > 0 else 0.0
+
+    def reserve(self, now, max_wait=None):
+        """Reserve the next send slot; returns (wait, needed) with wait None if needed > max_wait"""
+        tolerance = (self.burst - 1) * self.interval
+        start = max(now, self.tat - tolerance, self.parked_until)
+        wait = start - now
+        if max_wait is not None and wait > max_wait:
+            return None, wait
+        self.tat = max(self.tat, start) + self.interval
+        return wait, wait
+
+    def tokens(self, now):
+        if self.interval == 0:
+            return float(self.burst)
+        backlog = max(0.0, self.tat - now) / self.interval
+        return max(0.0, self.burst - backlog)
+
+
+class SendScheduler:
+    """Pace outgoing sends per account and park accounts Telegram flood-limited
+
+    rate is sends per second and burst the bucket size; overrides maps an
+    account key to {'rate': ..., 'burst': ...}. A rate of 0 disables pacing
+    (parking still applies).
+    """
+
+    def __init__(self, rate=1.0, burst=3, overrides=None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.rejected = 0
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            limits = self.overrides.get(key, {})
+            bucket = self._buckets[key] = AccountBucket(
+                float(limits.get('rate', self.rate)),
+                int(limits.get('burst', self.burst))
+            )
+        return bucket
+
+    async def acquire(self, key, max_wait=None):
+        """Wait for the account's next send slot
+
+        Raises RateLimited instead of waiting longer than max_wait seconds.
+        """
+        with self._lock:
+            bucket = self._bucket(key)
+            wait, needed = bucket.reserve(time.monotonic(), max_wait)
+            if wait is None:
+                self.rejected += 1
+                raise RateLimited(key, needed)
+            bucket.queued += 1
+
+        try:
+            if wait > 0:
+                self.throttled += 1
+                await asyncio.sleep(wait)
+            # The account may have been parked while we waited for our slot
+            while True:
+                with self._lock:
+                    remaining = bucket.parked_until - time.monotonic()
+                if remaining <= 0:
+                    break
+                if max_wait is not None and remaining > max_wait:
+                    self.rejected += 1
+                    raise RateLimited(key, remaining)
+                await asyncio.sleep(remaining)
+            bucket.sent += 1
+        finally:
+            with self._lock:
+                bucket.queued -= 1
+
+    def park(self, key, seconds):
+        """Stop sends from an account for the flood wait Telegram returned"""
+        with self._lock:
+            bucket = self._bucket(key)
+            now = time.monotonic()
+            bucket.parked_until = max(bucket.parked_until, now + seconds)
+            bucket.tat = max(bucket.tat, bucket.parked_until)
+            bucket.flood_waits += 1
+        logger.warning(f"⏳ Account {key} parked for {seconds}s (flood wait)")
+
+    def parked_for(self, key):
+        """Seconds until the account may send again (0 if not parked)"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return 0.0
+            return max(0.0, bucket.parked_until - time.monotonic())
+
+    def stats(self):
+        """Scheduler state for health reporting"""
+        now = time.monotonic()
+        with self._lock:
+            accounts = {
+                key: {
+                    'rate': bucket.rate,
+                    'burst': bucket.burst,
+                    'tokens': round(bucket.tokens(now), 2),
+                    'queued': bucket.queued,
+                    'parked_for': round(max(0.0, bucket.parked_until - now), 1),
+                    'sent': bucket.sent,
+                    'flood_waits': bucket.flood_waits
+                }
+                for key, bucket in self._buckets.items()
+            }
+        return {
+            'accounts': accounts,
+            'queued': sum(a['queued'] for a in accounts.values()),
+            'parked': sum(1 for a in accounts.values() if a['parked_for'] > 0),
+            'throttled': self.throttled,
+            'rejected': self.rejected
+        }
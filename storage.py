@@ -0,0 +1,642 @@
+"""
+Session, conversation-state and entity-cache storage backends
+"""
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds an applied activity batch id is remembered (retries happen within minutes)
+ACTIVITY_BATCH_RETENTION = 86400
+
+
+def open_sqlite(path):
+    """Open a SQLite database in WAL mode, shareable between threads"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=5000')
+    return conn
+
+
+class SessionStore:
+    """Interface every session storage backend implements
+
+    Rows are dicts shaped like the telegram_sessions table: id, user_id,
+    phone_number, session_string, is_active, created_at, last_used, send_count.
+    on_change(user_id, session_id=None) is called after every write so
+    callers can drop cached copies.
+    """
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change
+
+    def changed(self, user_id, session_id=None):
+        if self.on_change:
+            self.on_change(user_id, session_id)
+
+    def create_telegram_sessions_table(self):
+        """Create tables for telegram sessions"""
+        raise NotImplementedError
+
+    def save_telegram_session(self, user_id, phone_number, session_string):
+        """Save telegram session, returning the stored row or None"""
+        raise NotImplementedError
+
+    def get_user_sessions(self, user_id):
+        """Get all active sessions for a user"""
+        raise NotImplementedError
+
+    def get_session_by_phone(self, user_id, phone_number):
+        """Get the active session for a phone number, or None"""
+        raise NotImplementedError
+
+    def list_user_sessions(self, user_id, limit, offset=0):
+        """One page of a user's active sessions as (rows, total); rows hold only id and phone_number"""
+        raise NotImplementedError
+
+    def get_session_strings(self, user_id, session_ids):
+        """{session_id: session_string} for the given active sessions of a user"""
+        raise NotImplementedError
+
+    def deactivate_session(self, session_id, user_id):
+        """Deactivate a session, returning True on success"""
+        raise NotImplementedError
+
+    def record_activity(self, batch_id, entries):
+        """Apply buffered usage [(session_id, last_used epoch seconds, sends)], returning True on success
+
+        A batch_id that was already applied is skipped (and reported as success).
+        """
+        raise NotImplementedError
+
+
+class SQLiteSessionStore(SessionStore):
+    """Embedded session store for single-node deployments, tests and benchmarks"""
+
+    def __init__(self, path, on_change=None):
+        super().__init__(on_change)
+        self.path = path
+        self._conn = open_sqlite(path)
+        self._lock = threading.Lock()
+        self.create_telegram_sessions_table()
+
+    def create_telegram_sessions_table(self):
+        """Create tables for telegram sessions"""
+        with self._lock:
+            self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS telegram_sessions (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                phone_number TEXT NOT NULL,
+                session_string TEXT NOT NULL,
+                is_active INTEGER NOT NULL DEFAULT 1,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                last_used TEXT,
+                send_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_telegram_sessions_user
+                ON telegram_sessions (user_id);
+            CREATE INDEX IF NOT EXISTS idx_telegram_sessions_user_phone_active
+                ON telegram_sessions (user_id, phone_number, is_active);
+            CREATE INDEX IF NOT EXISTS idx_telegram_sessions_user_active_created
+                ON telegram_sessions (user_id, is_active, created_at);
+            -- Activity batches already applied, so a retried batch is not counted twice
+            CREATE TABLE IF NOT EXISTS session_activity_batches (
+                id TEXT PRIMARY KEY,
+                applied_at REAL NOT NULL
+            );
+            """)
+            # Databases created before send_count existed
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(telegram_sessions)")}
+            if 'send_count' not in columns:
+                self._conn.execute(
+                    "ALTER TABLE telegram_sessions ADD COLUMN send_count INTEGER NOT NULL DEFAULT 0"
+                )
+        return True
+
+    def save_telegram_session(self, user_id, phone_number, session_string):
+        """Save telegram session to database"""
+        try:
+            session_id = str(uuid.uuid4())[:8]
+            now = datetime.now().isoformat()
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO telegram_sessions (id, user_id, phone_number, session_string, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, user_id, phone_number, session_string, now, now)
+                )
+                row = self._conn.execute(
+                    "SELECT * FROM telegram_sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+            self.changed(user_id)
+            return _row_to_dict(row)
+        except Exception as e:
+            logger.error(f"Error saving session: {e}")
+            return None
+
+    def get_user_sessions(self, user_id):
+        """Get all sessions for a user"""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM telegram_sessions WHERE user_id = ? AND is_active = 1 "
+                    "ORDER BY created_at, rowid",
+                    (user_id,)
+                ).fetchall()
+            return [_row_to_dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting sessions: {e}")
+            return []
+
+    def get_session_by_phone(self, user_id, phone_number):
+        """Get specific session by phone number"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT * FROM telegram_sessions "
+                    "WHERE user_id = ? AND phone_number = ? AND is_active = 1 LIMIT 1",
+                    (user_id, phone_number)
+                ).fetchone()
+            return _row_to_dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Error getting session: {e}")
+            return None
+
+    def list_user_sessions(self, user_id, limit, offset=0):
+        """One page of a user's active sessions, without the session strings"""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, phone_number FROM telegram_sessions WHERE user_id = ? AND is_active = 1 "
+                    "ORDER BY created_at, rowid LIMIT ? OFFSET ?",
+                    (user_id, limit, offset)
+                ).fetchall()
+                total = self._conn.execute(
+                    "SELECT COUNT(*) AS n FROM telegram_sessions WHERE user_id = ? AND is_active = 1",
+                    (user_id,)
+                ).fetchone()['n']
+            return [dict(row) for row in rows], total
+        except Exception as e:
+            logger.error(f"Error listing sessions: {e}")
+            return [], 0
+
+    def get_session_strings(self, user_id, session_ids):
+        """Session strings for the given sessions only"""
+        if not session_ids:
+            return {}
+        try:
+            placeholders = ', '.join('?' for _ in session_ids)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, session_string FROM telegram_sessions "
+                    f"WHERE user_id = ? AND is_active = 1 AND id IN ({placeholders})",
+                    (user_id, *session_ids)
+                ).fetchall()
+            return {row['id']: row['session_string'] for row in rows}
+        except Exception as e:
+            logger.error(f"Error getting session strings: {e}")
+            return {}
+
+    def deactivate_session(self, session_id, user_id):
+        """Deactivate a session"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE telegram_sessions SET is_active = 0 WHERE id = ? AND user_id = ?",
+                    (session_id, user_id)
+                )
+            self.changed(user_id, session_id)
+            return True
+        except Exception as e:
+            logger.error(f"Error deactivating session: {e}")
+            return False
+
+    def record_activity(self, batch_id, entries):
+        """Apply buffered usage in one transaction, once per batch_id"""
+        rows = [
+            (datetime.fromtimestamp(last_used).isoformat(), sends, session_id)
+            for session_id, last_used, sends in entries
+        ]
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    claimed = self._conn.execute(
+                        "INSERT OR IGNORE INTO session_activity_batches (id, applied_at) VALUES (?, ?)",
+                        (batch_id, now)
+                    ).rowcount
+                    self._conn.execute(
+                        "DELETE FROM session_activity_batches WHERE applied_at < ?",
+                        (now - ACTIVITY_BATCH_RETENTION,)
+                    )
+                    if not claimed:
+                        self._conn.execute("COMMIT")
+                        return True
+                    # ISO timestamps compare correctly as text
+                    self._conn.executemany(
+                        "UPDATE telegram_sessions SET last_used = MAX(COALESCE(last_used, ''), ?), "
+                        "send_count = send_count + ? WHERE id = ?",
+                        rows
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            return True
+        except Exception as e:
+            logger.error(f"Error recording activity: {e}")
+            return False
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AsyncStoreAdapter:
+    """Expose a local (sub-millisecond) sync store through the async store surface"""
+
+    def __init__(self, store):
+        self.store = store
+
+    async def create_telegram_sessions_table(self):
+        return self.store.create_telegram_sessions_table()
+
+    async def save_telegram_session(self, user_id, phone_number, session_string):
+        return self.store.save_telegram_session(user_id, phone_number, session_string)
+
+    async def get_user_sessions(self, user_id):
+        return self.store.get_user_sessions(user_id)
+
+    async def get_session_by_phone(self, user_id, phone_number):
+        return self.store.get_session_by_phone(user_id, phone_number)
+
+    async def list_user_sessions(self, user_id, limit, offset=0):
+        return self.store.list_user_sessions(user_id, limit, offset)
+
+    async def get_session_strings(self, user_id, session_ids):
+        return self.store.get_session_strings(user_id, session_ids)
+
+    async def deactivate_session(self, session_id, user_id):
+        return self.store.deactivate_session(session_id, user_id)
+
+
+class StateStore:
+    """Interface for short-lived conversation state shared between workers
+
+    Values are JSON-serializable dicts stored under (namespace, key) with a
+    TTL. A networked implementation (Redis, memcached, ...) subclasses this
+    and is selected with STATE_STORE=package.module:ClassName; it is built
+    with the STATE_STORE_URL setting as its only argument.
+    """
+
+    def get(self, namespace, key):
+        raise NotImplementedError
+
+    def set(self, namespace, key, value, ttl):
+        raise NotImplementedError
+
+    def add(self, namespace, key, value, ttl):
+        """Store value only if key is absent or expired; returns True if it was stored
+
+        Implementations should make this atomic; this fallback is not.
+        """
+        if self.get(namespace, key) is not None:
+            return False
+        self.set(namespace, key, value, ttl)
+        return True
+
+    def pop(self, namespace, key):
+        """Atomically remove and return a value (None if absent or expired)"""
+        raise NotImplementedError
+
+    def delete(self, namespace, key):
+        raise NotImplementedError
+
+    def count(self, namespace):
+        raise NotImplementedError
+
+    def expire(self):
+        """Drop expired entries; returns how many were dropped"""
+        return 0
+
+    def stats(self):
+        return {}
+
+
+class MemoryStateStore(StateStore):
+    """Per-process state store; only correct with a single worker"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def _cache(self, namespace):
+        with self._lock:
+            cache = self._namespaces.get(namespace)
+            if cache is None:
+                cache = self._namespaces[namespace] = TTLCache(maxsize=self.maxsize)
+            return cache
+
+    def get(self, namespace, key):
+        return self._cache(namespace).get(str(key))
+
+    def set(self, namespace, key, value, ttl):
+        self._cache(namespace).set(str(key), value, ttl=ttl)
+
+    def add(self, namespace, key, value, ttl):
+        cache = self._cache(namespace)
+        with self._lock:
+            if cache.get(str(key)) is not None:
+                return False
+            cache.set(str(key), value, ttl=ttl)
+            return True
+
+    def pop(self, namespace, key):
+        return self._cache(namespace).pop(str(key))
+
+    def delete(self, namespace, key):
+        self._cache(namespace).invalidate(str(key))
+
+    def count(self, namespace):
+        return len(self._cache(namespace))
+
+    def expire(self):
+        with self._lock:
+            caches = list(self._namespaces.values())
+        return sum(cache.expire() for cache in caches)
+
+    def stats(self):
+        with self._lock:
+            return {name: cache.stats() for name, cache in self._namespaces.items()}
+
+
+class SQLiteStateStore(StateStore):
+    """State store in a SQLite file shared by every worker on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = open_sqlite(path)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS conversation_state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_conversation_state_expires
+                ON conversation_state (expires_at);
+            """)
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM conversation_state WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, str(key), time.time())
+            ).fetchone()
+        return json.loads(row['value']) if row else None
+
+    def set(self, namespace, key, value, ttl):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversation_state (namespace, key, value, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (namespace, str(key), json.dumps(value), time.time() + ttl)
+            )
+
+    def add(self, namespace, key, value, ttl):
+        # The upsert only overwrites an expired row, so one caller wins across processes
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO conversation_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE conversation_state.expires_at <= ?",
+                (namespace, str(key), json.dumps(value), now + ttl, now)
+            )
+        return cursor.rowcount == 1
+
+    def pop(self, namespace, key):
+        # DELETE ... RETURNING makes the read-and-remove atomic across processes
+        with self._lock:
+            row = self._conn.execute(
+                "DELETE FROM conversation_state WHERE namespace = ? AND key = ? RETURNING value, expires_at",
+                (namespace, str(key))
+            ).fetchone()
+        if not row or row['expires_at'] <= time.time():
+            return None
+        return json.loads(row['value'])
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM conversation_state WHERE namespace = ? AND key = ?",
+                (namespace, str(key))
+            )
+
+    def count(self, namespace):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS n FROM conversation_state WHERE namespace = ? AND expires_at > ?",
+                (namespace, time.time())
+            ).fetchone()
+        return row['n']
+
+    def expire(self):
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM conversation_state WHERE expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, COUNT(*) AS n FROM conversation_state GROUP BY namespace"
+            ).fetchall()
+        return {row['namespace']: {'size': row['n']} for row in rows}
+
+
+class StateNamespace:
+    """Dict-like view of one StateStore namespace with a fixed TTL"""
+
+    def __init__(self, store, namespace, ttl):
+        self.store = store
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        value = self.store.get(self.namespace, key)
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        self.store.set(self.namespace, key, value, self.ttl if ttl is None else ttl)
+
+    def add(self, key, value, ttl=None):
+        """Store value unless key is already present; returns True if it was stored"""
+        return self.store.add(self.namespace, key, value, self.ttl if ttl is None else ttl)
+
+    def pop(self, key, default=None):
+        value = self.store.pop(self.namespace, key)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return self.store.get(self.namespace, key) is not None
+
+    def __getitem__(self, key):
+        value = self.store.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        self.store.delete(self.namespace, key)
+
+    def __len__(self):
+        return self.store.count(self.namespace)
+
+    def stats(self):
+        return {'size': len(self), 'ttl': self.ttl}
+
+
+def create_state_store(kind, path=None, url=None, maxsize=10000):
+    """Build the StateStore named by STATE_STORE"""
+    if kind == 'sqlite':
+        return SQLiteStateStore(path)
+    if kind and ':' in kind:
+        module_name, class_name = kind.split(':', 1)
+        store_class = getattr(importlib.import_module(module_name), class_name)
+        return store_class(url)
+    if kind not in (None, '', 'memory'):
+        logger.warning(f"⚠️ Unknown STATE_STORE '{kind}', using memory")
+    return MemoryStateStore(maxsize=maxsize)
+
+
+class EntityCache:
+    """Per-account cache of resolved send targets (peer type, id and access_hash)
+
+    Access hashes are tied to the Telegram account that resolved them, so
+    rows are keyed by (account, target). Backed by SQLite because it is
+    read on every send and only needs to be shared between workers on one host.
+    """
+
+    def __init__(self, path, ttl=86400):
+        self.path = path
+        self.ttl = ttl
+        self._conn = open_sqlite(path)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        with self._lock:
+            self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entity_cache (
+                account TEXT NOT NULL,
+                target TEXT NOT NULL,
+                peer_type TEXT NOT NULL,
+                peer_id INTEGER NOT NULL,
+                access_hash INTEGER,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (account, target)
+            );
+            """)
+
+    @staticmethod
+    def normalize_target(target):
+        """'@Name' and 'name' share one cache row, as do '+1 555' and '+1555'
+
+        Numeric targets keep their sign: -100123 (a channel) and 100123 are
+        different peers.
+        """
+        target = ''.join(str(target).split())
+        if target.lstrip('+-').isdigit():
+            return target
+        return target.lstrip('@').lower()
+
+    def get(self, account, target):
+        """Return {'peer_type', 'peer_id', 'access_hash'} or None"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT peer_type, peer_id, access_hash FROM entity_cache "
+                    "WHERE account = ? AND target = ? AND expires_at > ?",
+                    (str(account), self.normalize_target(target), time.time())
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"Error reading entity cache: {e}")
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(row)
+
+    def set(self, account, target, peer_type, peer_id, access_hash=None):
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entity_cache "
+                    "(account, target, peer_type, peer_id, access_hash, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (str(account), self.normalize_target(target), peer_type, peer_id,
+                     access_hash, time.time() + self.ttl)
+                )
+        except Exception as e:
+            logger.error(f"Error writing entity cache: {e}")
+
+    def invalidate(self, account, target):
+        self.invalidations += 1
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "DELETE FROM entity_cache WHERE account = ? AND target = ?",
+                    (str(account), self.normalize_target(target))
+                )
+        except Exception as e:
+            logger.error(f"Error invalidating entity cache: {e}")
+
+    def expire(self):
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM entity_cache WHERE expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) AS n FROM entity_cache").fetchone()['n']
+        return {
+            'size': size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations
+        }
+
+
+def _row_to_dict(row):
+    data = dict(row)
+    if 'is_active' in data:
+        data['is_active'] = bool(data['is_active'])
+    return data
@@ -0,0 +1,26 @@
+from router import CommandRouter
+
+
+def handler(user_info, chat_id, message_text):
+    return message_text
+
+
+def make_router():
+    router = CommandRouter(bot_username='MyBot')
+    router.register('help', handler)
+    return router
+
+
+def test_resolve_command_for_this_bot():
+    command, found, text = make_router().resolve('/Help@mybot now')
+    assert command == '/help'
+    assert found is handler
+    assert text == '/help now'
+
+
+def test_resolve_unknown_command_keeps_text():
+    assert make_router().resolve('/nope 1') == (None, None, '/nope 1')
+
+
+def test_resolve_command_for_other_bot_is_not_addressed():
+    assert make_router().resolve('/help@otherbot') == (None, None, None)
@@ -0,0 +1,397 @@
+"""
+Opt-in request tracing: nested timing spans written as JSON lines, with
+optional per-request profiles
+"""
+import collections
+import contextvars
+import cProfile
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# (trace, span id) of the innermost open span in this context
+_current = contextvars.ContextVar('trace_span', default=None)
+
+
+class _NoopSpan:
+    """Returned when nothing is being traced, so disabled spans cost one check"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    def __init__(self, name, attrs, max_spans):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.max_spans = max_spans
+        self.started = time.perf_counter()
+        self.timestamp = time.time()
+        self.spans = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+
+    def new_span_id(self):
+        return next(self._ids)
+
+    def add(self, span):
+        # Spans may finish on several threads; list.append is atomic
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+
+class Span:
+    __slots__ = ('trace', 'parent', 'id', 'name', 'attrs', 'start', '_token')
+
+    def __init__(self, trace, parent, name, attrs):
+        self.trace = trace
+        self.parent = parent
+        self.id = trace.new_span_id()
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self._token = _current.set((self.trace, self.id))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _current.reset(self._token)
+        record = {
+            'id': self.id,
+            'parent': self.parent,
+            'name': self.name,
+            'start_ms': round((self.start - self.trace.started) * 1000, 3),
+            'ms': round((end - self.start) * 1000, 3),
+            'thread': threading.current_thread().name
+        }
+        if exc_type is not None:
+            record['error'] = f"{exc_type.__name__}: {exc}"
+        if self.attrs:
+            record['attrs'] = self.attrs
+        self.trace.add(record)
+        return False
+
+
+class CProfileProfiler:
+    """Deterministic profile of the thread that opened the trace"""
+
+    def __init__(self, top=40):
+        self.top = top
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        stats = pstats.Stats(self.profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+        return {
+            'type': 'cprofile',
+            'functions': [
+                {
+                    'function': f"{filename}:{line}({name})",
+                    'calls': calls,
+                    'tottime_ms': round(tottime * 1000, 3),
+                    'cumtime_ms': round(cumtime * 1000, 3)
+                }
+                for (filename, line, name), (_, calls, tottime, cumtime, _) in rows
+            ]
+        }
+
+
+class SamplingProfiler:
+    """Statistical profile: samples every thread's stack, so work handed to the
+    background loop or executor threads is included (as is other concurrent work)"""
+
+    def __init__(self, interval=0.005, top=40, max_depth=64):
+        self.interval = interval
+        self.top = top
+        self.max_depth = max_depth
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='trace-sampler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < self.max_depth:
+                    code = frame.f_code
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(frames))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return {
+            'type': 'sampling',
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            # Folded stacks (thread;outer;...;inner), ready for flamegraph tools
+            'stacks': dict(self.stacks.most_common(self.top))
+        }
+
+
+PROFILERS = {
+    'cprofile': CProfileProfiler,
+    'sampling': SamplingProfiler
+}
+
+
+class _Root:
+    """Context manager for a whole request; writes the trace when it is kept"""
+
+    def __init__(self, tracer, name, force_profile, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.force_profile = force_profile
+        self.attrs = attrs
+
+    def __enter__(self):
+        tracer = self.tracer
+        self.trace = Trace(self.name, self.attrs, tracer.max_spans)
+        self.profiler = None
+        if self.force_profile or (tracer.profile_rate and random.random() < tracer.profile_rate):
+            self.profiler = tracer._start_profiler()
+            if self.profiler is None:
+                self.trace.attrs['profile'] = 'busy'
+        self._token = _current.set((self.trace, 0))
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        duration = time.perf_counter() - self.trace.started
+        profile = None
+        if self.profiler is not None:
+            try:
+                profile = self.profiler.stop()
+            finally:
+                self.tracer._profile_lock.release()
+        self.tracer._finish(self.trace, duration, profile, exc_type and f"{exc_type.__name__}: {exc}")
+        return False
+
+
+class Tracer:
+    """Collect spans for each request and keep a sample of them
+
+    Every trace is collected in memory while the request runs; when it ends
+    it is written if it was sampled (sample_rate), slower than
+    slow_threshold seconds, or profiled. profile_rate of requests (and any
+    request opened with force_profile) also carry a cProfile or sampling
+    profile; only one request is profiled at a time.
+    """
+
+    def __init__(self, path, enabled=True, sample_rate=0.01, slow_threshold=5.0, profile_rate=0.0,
+                 profiler='cprofile', profile_key=None, max_spans=1000, max_bytes=50 * 1024 * 1024):
+        if profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profiler!r}; expected one of {', '.join(PROFILERS)}")
+        self.path = path
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.profile_rate = profile_rate
+        self.profiler = profiler
+        self.profile_key = profile_key
+        self.max_spans = max_spans
+        self.max_bytes = max_bytes
+        self._write_lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self.traces = 0
+        self.written = 0
+        self.slow = 0
+        self.profiled = 0
+        self.write_errors = 0
+        if enabled and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def trace(self, name, force_profile=False, **attrs):
+        """Open a request trace; inside an open trace this is just a span"""
+        if not self.enabled:
+            return NOOP_SPAN
+        if _current.get() is not None:
+            return self.span(name, **attrs)
+        return _Root(self, name, force_profile, attrs)
+
+    def span(self, name, **attrs):
+        """Time a block as a child of the current span"""
+        current = _current.get() if self.enabled else None
+        if current is None:
+            return NOOP_SPAN
+        trace, parent = current
+        return Span(trace, parent, name, attrs)
+
+    def record(self, name, seconds, error=None, **attrs):
+        """Add a span that has already finished (e.g. from a latency observer)"""
+        current = _current.get() if self.enabled else None
+        if current is None:
+            return
+        trace, parent = current
+        end = time.perf_counter()
+        span = {
+            'id': trace.new_span_id(),
+            'parent': parent,
+            'name': name,
+            'start_ms': round((end - seconds - trace.started) * 1000, 3),
+            'ms': round(seconds * 1000, 3),
+            'thread': threading.current_thread().name
+        }
+        if error:
+            span['error'] = error
+        if attrs:
+            span['attrs'] = attrs
+        trace.add(span)
+
+    def tag(self, **attrs):
+        """Set attributes on the current request's trace"""
+        current = _current.get() if self.enabled else None
+        if current is not None:
+            current[0].attrs.update(attrs)
+
+    def bind(self, coro):
+        """Carry the current span into a coroutine that runs on another loop/thread"""
+        current = _current.get() if self.enabled else None
+        if current is None:
+            return coro
+        return self._bound(coro, current)
+
+    async def _bound(self, coro, current):
+        # Runs as its own task, so this only affects that task's context
+        _current.set(current)
+        return await coro
+
+    def traced(self, name):
+        """Decorator: run the function (sync or async) inside a span"""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+            else:
+                @functools.wraps(fn)
+                def wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def profile_requested(self, header_value):
+        """True when a request's profiling header carries the configured key"""
+        return bool(self.enabled and self.profile_key and header_value == self.profile_key)
+
+    def _start_profiler(self):
+        if not self._profile_lock.acquire(blocking=False):
+            return None
+        try:
+            profiler = PROFILERS[self.profiler]()
+            profiler.start()
+        except Exception as e:
+            self._profile_lock.release()
+            logger.warning(f"⚠️ Could not start profiler: {e}")
+            return None
+        return profiler
+
+    def _finish(self, trace, duration, profile, error):
+        self.traces += 1
+        slow = duration >= self.slow_threshold
+        if slow:
+            self.slow += 1
+        if profile is not None:
+            self.profiled += 1
+            kept = 'profiled'
+        elif slow:
+            kept = 'slow'
+        elif random.random() < self.sample_rate:
+            kept = 'sampled'
+        else:
+            return
+
+        record = {
+            'trace_id': trace.id,
+            'name': trace.name,
+            'timestamp': trace.timestamp,
+            'ms': round(duration * 1000, 3),
+            'kept': kept,
+            'attrs': trace.attrs,
+            'spans': sorted(trace.spans, key=lambda span: span['start_ms'])
+        }
+        if error:
+            record['error'] = error
+        if trace.dropped:
+            record['dropped_spans'] = trace.dropped
+        if profile is not None:
+            record['profile'] = profile
+        self._write(record)
+        if slow:
+            logger.warning(f"🐢 Slow {trace.name} ({duration:.1f}s) traced as {trace.id}")
+
+    def _write(self, record):
+        line = json.dumps(record, default=str) + '\n'
+        try:
+            with self._write_lock:
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, self.path + '.1')
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            self.written += 1
+        except Exception as e:
+            self.write_errors += 1
+            logger.warning(f"⚠️ Could not write trace: {e}")
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'path': self.path,
+            'sample_rate': self.sample_rate,
+            'slow_threshold': self.slow_threshold,
+            'profile_rate': self.profile_rate,
+            'profiler': self.profiler,
+            'traces': self.traces,
+            'written': self.written,
+            'slow': self.slow,
+            'profiled': self.profiled,
+            'write_errors': self.write_errors
+        }